@@ -4,14 +4,24 @@ from airflow.sdk import dag, task, TaskGroup
 from airflow.utils import yaml
 from pendulum import datetime
 
+from include.etl.anomalies import append_segment_stats, rollup_stats
+from include.etl.customer_spend import save_spend_index, update_spend_index
+from include.etl.daily_rollup import append_daily_rollup, build_daily_rollup
 from include.etl.extract_data import extract_data_from_s3
-from include.etl.transform import clean_sales_data, clean_customers_data, clean_products_data, compute_monthly_aggregates, forecast_sales, merge_data, segment_customers, detect_sales_anomalies
+from include.etl.forecast import update_forecast_store
+from include.etl.transform import clean_sales_data, clean_customers_data, clean_products_data, compute_monthly_aggregates, segment_customers, detect_sales_anomalies
 from include.etl.load_data import load_data_to_snowflake
+from include.etl.partitioning import combine_partitions, partition_by_month
+from include.s3_utils import get_storage_options
+from include.validations.fast_validation import set_validation_mode
+from include.xcom_backend import clear_run_cache
 
 
 with open("include/config.yaml", "r") as file:
     config = yaml.safe_load(file)
 
+set_validation_mode(config["validation"]["mode"], config["validation"]["sample_size"])
+
 
 @dag(
     start_date=datetime(2025, 1, 1),
@@ -21,95 +31,133 @@ with open("include/config.yaml", "r") as file:
 )
 
 def etl_pipeline_dag():
+    @task(multiple_outputs=True)
+    def extract_data(bucket: str, folder: str, aws_conn_id: str, routes: dict, max_workers: int) -> dict:
+        return extract_data_from_s3(bucket, folder, aws_conn_id, routes, max_workers)
+    
     @task()
-    def extract_data(bucket: str, folder: str, aws_conn_id: str)-> dict:
-        return extract_data_from_s3(bucket, folder, aws_conn_id)
-        
-    @task()
-    def get_sales_file(files: dict):
-        for key, df in files.items():
-            if "sales" in key.lower():
-                return df.to_json(orient="split")   # Here it's better to save data into parquet format - df.to_parquet(path to save - to cloud storage or base)
-        raise ValueError("No sales file found")
-
+    def transform_sales_data(sales_df: pd.DataFrame) -> pd.DataFrame:
+        return clean_sales_data(sales_df)
+    
     @task()
-    def get_customers_file(files: dict):
-        for key, df in files.items():
-            if "customer" in key.lower():
-                return df.to_json(orient="split")
-        raise ValueError("No customer file found")
+    def transform_customers_data(customers_df: pd.DataFrame) -> pd.DataFrame:
+        return clean_customers_data(customers_df)
 
     @task()
-    def get_products_file(files: dict):
-        for key, df in files.items():
-            if "product" in key.lower():
-                return df.to_json(orient="split")
-        raise ValueError("No product file found")
+    def transform_products_data(products_df: pd.DataFrame) -> pd.DataFrame:
+        return clean_products_data(products_df)
     
     @task()
-    def transform_sales_data(sales_file: str) -> str:
+    def partition_sales_task(sales_df: pd.DataFrame) -> list:
+        return partition_by_month(sales_df)
 
-        sales_df = pd.read_json(sales_file, orient="split")   # Here read from S3 with storage options
-        sales_df = clean_sales_data(sales_df)
-        return sales_df.to_json(orient="split", date_format='iso')
-    
     @task()
-    def transform_customers_data(customers_file: str) -> str:
+    def partial_rollup_task(sales_df: pd.DataFrame) -> pd.DataFrame:
+        return build_daily_rollup(
+            sales_df,
+            relative_error=config["aggregates"]["relative_error"],
+            exact_id_limit=config["aggregates"]["exact_id_limit"]
+        )
 
-        customers_df = pd.read_json(customers_file, orient="split")   
-        customers_df = clean_customers_data(customers_df)
-        return customers_df.to_json(orient="split", date_format='iso')
+    @task(multiple_outputs=True)
+    def reduce_sales_partitions(sales_parts: list, rollup_parts: list) -> dict:
+        # Months do not share days, the partial rollups only need to be put in order
+        return {
+            "sales": combine_partitions(sales_parts, unique_columns=["order_id"]),
+            "rollup": pd.concat(list(rollup_parts), ignore_index=True).sort_values("order_date", ignore_index=True),
+        }
 
     @task()
-    def transform_products_data(products_file: str) -> str:
+    def combine_partitions_task(parts: list) -> pd.DataFrame:
+        return combine_partitions(parts)
 
-        products_df = pd.read_json(products_file, orient="split")   
-        products_df = clean_products_data(products_df)
-        return products_df.to_json(orient="split")
-    
     @task()
-    def merged_data_task(transformed_sales: str, transformed_customers: str, transformed_products: str) -> str:
-        sales_df = pd.read_json(transformed_sales, orient="split")
-        customers_df = pd.read_json(transformed_customers, orient="split")
-        products_df = pd.read_json(transformed_products, orient="split")
+    def daily_rollup_task(rollup_df: pd.DataFrame, store_path: str, aws_conn_id: str) -> pd.DataFrame:
+        s3_hook, storage_options = get_storage_options(aws_conn_id)
+        return append_daily_rollup(rollup_df, store_path, storage_options)
 
-        merged_df = merge_data(sales_df, customers_df, products_df)
-        return merged_df.to_json(orient="split")
-    
     @task()
-    def aggregated_data_task(merged_data: str) -> str:
-        merged_df = pd.read_json(merged_data, orient="split")
-        aggregated_df = compute_monthly_aggregates(merged_df)
-        return aggregated_df.to_json(orient="split", date_format='iso')
+    def aggregated_data_task(rollup_df: pd.DataFrame) -> pd.DataFrame:
+        return compute_monthly_aggregates(
+            rollup_df,
+            distinct_mode=config["aggregates"]["distinct_mode"],
+            relative_error=config["aggregates"]["relative_error"],
+            auto_threshold=config["aggregates"]["auto_threshold"]
+        )
     
+    @task(multiple_outputs=True)
+    def segmented_customers_task(sales_df: pd.DataFrame, customers_df: pd.DataFrame, store_path: str, aws_conn_id: str) -> dict:
+        s3_hook, storage_options = get_storage_options(aws_conn_id)
+        # Only customers with new orders are segmented and merged into the target, a replaced target needs every customer
+        spend_update = update_spend_index(sales_df, store_path, storage_options)
+        spend_df = spend_update["changed"] if config["snowflake"]["load"]["mode"] == "merge" else spend_update["index"]
+
+        return {
+            "segmented": segment_customers(spend_df, customers_df),
+            "spend_index": spend_update["index"],
+            "watermark_orders": spend_update["watermark_orders"],
+        }
+
     @task()
-    def segmented_customers_task(sales_data: str, customers_data: str) -> str:
-        sales_df = pd.read_json(sales_data, orient="split")
-        customers_df = pd.read_json(customers_data, orient="split")
-        segmented_df = segment_customers(sales_df, customers_df) 
-        return segmented_df.to_json(orient="split", date_format='iso')
+    def save_spend_index_task(spend_index_df: pd.DataFrame, watermark_orders_df: pd.DataFrame, store_path: str, aws_conn_id: str):
+        # Saved once the segmented customers are loaded, a failed load recomputes the same changes on the next run
+        s3_hook, storage_options = get_storage_options(aws_conn_id)
+        save_spend_index(spend_index_df, watermark_orders_df, store_path, storage_options)
     
     @task()
-    def anomalies_sales_task(sales_data: str) -> str:
-        sales_df = pd.read_json(sales_data, orient="split")
-        sales_df = detect_sales_anomalies(sales_df)
-        return sales_df.to_json(orient="split", date_format='iso')
+    def anomaly_stats_task(sales_df: pd.DataFrame, rollup_df: pd.DataFrame, store_path: str, aws_conn_id: str) -> pd.DataFrame:
+        segment = config["anomalies"]["segment"]
+
+        if segment:
+            s3_hook, storage_options = get_storage_options(aws_conn_id)
+            return append_segment_stats(sales_df, segment, f"{store_path}/{segment}", storage_options)
+
+        return rollup_stats(rollup_df)
+
+    @task()
+    def anomalies_sales_task(sales_df: pd.DataFrame, stats_df: pd.DataFrame) -> pd.DataFrame:
+        return detect_sales_anomalies(
+            sales_df,
+            stats_df,
+            config["anomalies"]["segment"],
+            sigma=config["anomalies"]["sigma"],
+            min_count=config["anomalies"]["min_count"]
+        )
     
     @task()
-    def forecasted_sales_task(sales_data: str) -> str:
-        sales_df = pd.read_json(sales_data, orient="split")
-        sales_df = forecast_sales(sales_df)
-        return sales_df.to_json(orient="split", date_format='iso')
+    def forecasted_sales_task(rollup_df: pd.DataFrame, store_path: str, aws_conn_id: str) -> pd.DataFrame:
+        s3_hook, storage_options = get_storage_options(aws_conn_id)
+        return update_forecast_store(
+            rollup_df,
+            store_path,
+            storage_options,
+            windows=config["forecast"]["windows"],
+            horizon=config["forecast"]["horizon"]
+        )
     
+    @task(trigger_rule="all_done")
+    def clear_dataframe_cache(dag_run=None):
+        # Other workers drop this run's tables through LRU eviction
+        clear_run_cache(dag_run.dag_id, dag_run.run_id)
+
     @task()
-    def load_to_snowflake_task(final_json: str, database: str, schema: str, table: str, snowflake_conn_id: str):
-        final_df = pd.read_json(final_json, orient="split")
+    def load_to_snowflake_task(final_df: pd.DataFrame, database: str, schema: str, table: str, snowflake_conn_id: str, keys: list | None = None,
+                               delete_missing: bool | None = None):
+        if final_df.empty and delete_missing is False and config["snowflake"]["load"]["mode"] == "merge":
+            # Incremental targets have nothing to merge on runs without changes
+            return
+
         load_data_to_snowflake(
             df=final_df,
             database=database,
             schema=schema,
             table=table,
-            snowflake_conn_id=snowflake_conn_id
+            snowflake_conn_id=snowflake_conn_id,
+            keys=keys if config["snowflake"]["load"]["mode"] == "merge" else None,
+            delete_missing=config["snowflake"]["load"]["delete_missing"] if delete_missing is None else delete_missing,
+            chunk_size=config["snowflake"]["load"]["chunk_size"],
+            parallelism=config["snowflake"]["load"]["parallelism"],
+            compression=config["snowflake"]["load"]["compression"]
         )
 
 
@@ -117,94 +165,140 @@ def etl_pipeline_dag():
         files = extract_data(
             bucket = config["s3"]["bucket"],
             folder = config["s3"]["folder"],
-            aws_conn_id = config["aws_conn_id"]
+            aws_conn_id = config["aws_conn_id"],
+            routes = config["s3"]["routes"],
+            max_workers = config["s3"]["max_workers"]
         )
 
-        sales_file = get_sales_file(files)
-        customers_file = get_customers_file(files)
-        products_file = get_products_file(files)
 
+    partitioned = config["partitioning"]["mode"] == "month"
 
     with TaskGroup("transformation") as transformation:
-        transformed_sales = transform_sales_data(sales_file=sales_file)
-        transformed_customers = transform_customers_data(customers_file=customers_file)
-        transformed_products = transform_products_data(products_file=products_file)
-
-        merged_output = merged_data_task(
-            transformed_sales=transformed_sales,
-            transformed_customers=transformed_customers,
-            transformed_products=transformed_products
+        transformed_customers = transform_customers_data(customers_df=files["customers"])
+        transformed_products = transform_products_data(products_df=files["products"])
+
+        if partitioned:
+            # One mapped task per order month, the partial results are combined in input order
+            sales_partitions = transform_sales_data.expand(sales_df=partition_sales_task(files["sales"]))
+            reduced = reduce_sales_partitions(
+                sales_parts=sales_partitions,
+                rollup_parts=partial_rollup_task.expand(sales_df=sales_partitions)
+            )
+            transformed_sales, new_rollup = reduced["sales"], reduced["rollup"]
+        else:
+            transformed_sales = transform_sales_data(sales_df=files["sales"])
+            new_rollup = partial_rollup_task(sales_df=transformed_sales)
+
+        daily_rollup = daily_rollup_task(
+            rollup_df=new_rollup,
+            store_path=f"s3://{config['s3']['bucket']}/{config['s3']['rollup_folder']}",
+            aws_conn_id=config["aws_conn_id"]
         )
 
 
     with TaskGroup("analysis") as analysis:
-        aggregated_output = aggregated_data_task(merged_output)
+        aggregated_output = aggregated_data_task(daily_rollup)
 
-        segmented_customers_output = segmented_customers_task(
-            sales_data=transformed_sales,
-            customers_data=transformed_customers
+        segmented_customers = segmented_customers_task(
+            sales_df=transformed_sales,
+            customers_df=transformed_customers,
+            store_path=f"s3://{config['s3']['bucket']}/{config['s3']['customer_spend_folder']}",
+            aws_conn_id=config["aws_conn_id"]
         )
 
-        anomalies_sales_output = anomalies_sales_task(sales_data=transformed_sales)
+        anomaly_stats = anomaly_stats_task(
+            sales_df=transformed_sales,
+            rollup_df=daily_rollup,
+            store_path=f"s3://{config['s3']['bucket']}/{config['s3']['anomaly_stats_folder']}",
+            aws_conn_id=config["aws_conn_id"]
+        )
 
-        forecast_sales_output = forecasted_sales_task(sales_data=transformed_sales)
+        if partitioned:
+            anomalies_sales_output = combine_partitions_task(
+                anomalies_sales_task.partial(stats_df=anomaly_stats).expand(sales_df=sales_partitions)
+            )
+        else:
+            anomalies_sales_output = anomalies_sales_task(sales_df=transformed_sales, stats_df=anomaly_stats)
+
+        forecast_sales_output = forecasted_sales_task(
+            rollup_df=daily_rollup,
+            store_path=f"s3://{config['s3']['bucket']}/{config['s3']['forecast_folder']}",
+            aws_conn_id=config["aws_conn_id"]
+        )
 
 
     with TaskGroup("loading") as loading:
         load_to_snowflake_task.override(task_id="load_cleaned_sales")(
-            final_json=transformed_sales,
+            final_df=transformed_sales,
             database=config["snowflake"]["database"],
             schema=config["snowflake"]["targets"]["sales"]["schema"],
             table=config["snowflake"]["targets"]["sales"]["table"],
-            snowflake_conn_id=config["snowflake"]["conn_id"]
+            snowflake_conn_id=config["snowflake"]["conn_id"],
+            keys=config["snowflake"]["targets"]["sales"]["key"]
         )
 
         load_to_snowflake_task.override(task_id="load_cleaned_customers")(
-            final_json=transformed_customers,
+            final_df=transformed_customers,
             database=config["snowflake"]["database"],
             schema=config["snowflake"]["targets"]["customers"]["schema"],
             table=config["snowflake"]["targets"]["customers"]["table"],
-            snowflake_conn_id=config["snowflake"]["conn_id"]
+            snowflake_conn_id=config["snowflake"]["conn_id"],
+            keys=config["snowflake"]["targets"]["customers"]["key"]
         )
 
         load_to_snowflake_task.override(task_id="load_cleaned_products")(
-            final_json=transformed_products,
+            final_df=transformed_products,
             database=config["snowflake"]["database"],
             schema=config["snowflake"]["targets"]["products"]["schema"],
             table=config["snowflake"]["targets"]["products"]["table"],
-            snowflake_conn_id=config["snowflake"]["conn_id"]
+            snowflake_conn_id=config["snowflake"]["conn_id"],
+            keys=config["snowflake"]["targets"]["products"]["key"]
         )
         
         load_to_snowflake_task.override(task_id="load_monthly_sales")(
-            final_json=aggregated_output,
+            final_df=aggregated_output,
             database=config["snowflake"]["database"],
             schema=config["snowflake"]["targets"]["monthly_sales"]["schema"],
             table=config["snowflake"]["targets"]["monthly_sales"]["table"],
-            snowflake_conn_id=config["snowflake"]["conn_id"]
+            snowflake_conn_id=config["snowflake"]["conn_id"],
+            keys=config["snowflake"]["targets"]["monthly_sales"]["key"]
         )
 
-        load_to_snowflake_task.override(task_id="load_segmented_customers")(
-            final_json=segmented_customers_output,
+        load_segmented_customers = load_to_snowflake_task.override(task_id="load_segmented_customers")(
+            final_df=segmented_customers["segmented"],
             database=config["snowflake"]["database"],
             schema=config["snowflake"]["targets"]["segmented_customers"]["schema"],
             table=config["snowflake"]["targets"]["segmented_customers"]["table"],
-            snowflake_conn_id=config["snowflake"]["conn_id"]
+            snowflake_conn_id=config["snowflake"]["conn_id"],
+            keys=config["snowflake"]["targets"]["segmented_customers"]["key"],
+            delete_missing=config["snowflake"]["targets"]["segmented_customers"]["delete_missing"]
+        )
+
+        load_segmented_customers >> save_spend_index_task(
+            spend_index_df=segmented_customers["spend_index"],
+            watermark_orders_df=segmented_customers["watermark_orders"],
+            store_path=f"s3://{config['s3']['bucket']}/{config['s3']['customer_spend_folder']}",
+            aws_conn_id=config["aws_conn_id"]
         )
 
         load_to_snowflake_task.override(task_id="load_detect_sales_anomalies")(
-            final_json=anomalies_sales_output,
+            final_df=anomalies_sales_output,
             database=config["snowflake"]["database"],
             schema=config["snowflake"]["targets"]["detect_sales_anomalies"]["schema"],
             table=config["snowflake"]["targets"]["detect_sales_anomalies"]["table"],
-            snowflake_conn_id=config["snowflake"]["conn_id"]
+            snowflake_conn_id=config["snowflake"]["conn_id"],
+            keys=config["snowflake"]["targets"]["detect_sales_anomalies"]["key"]
         )
 
         load_to_snowflake_task.override(task_id="load_forecast_sales")(
-            final_json=forecast_sales_output,
+            final_df=forecast_sales_output,
             database=config["snowflake"]["database"],
             schema=config["snowflake"]["targets"]["forecast_sales"]["schema"],
             table=config["snowflake"]["targets"]["forecast_sales"]["table"],
-            snowflake_conn_id=config["snowflake"]["conn_id"]
+            snowflake_conn_id=config["snowflake"]["conn_id"],
+            keys=config["snowflake"]["targets"]["forecast_sales"]["key"]
         )
 
+    loading >> clear_dataframe_cache()
+
 etl_pipeline_dag()
@@ -0,0 +1,197 @@
+import ctypes
+import mmap
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .logger import setup_logger
+
+
+logging = setup_logger("dataframe_cache")
+
+
+CACHE_DIR_ENV = "XCOM_DATAFRAME_CACHE_DIR"
+CACHE_MAX_BYTES_ENV = "XCOM_DATAFRAME_CACHE_MAX_BYTES"  # 0 disables the cache
+
+# Shared memory when the worker has it, so cached tables never touch the disk
+DEFAULT_CACHE_DIR = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "airflow_dataframe_cache")
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Share of the cache filesystem the cache may use, /dev/shm is only 64 MB by default in Docker
+CACHE_FILESYSTEM_SHARE = 0.5
+
+
+def cache_enabled() -> bool:
+    return _max_bytes() > 0
+
+
+def cache_put(key: str, table: pa.Table) -> None:
+    """
+    Stores an Arrow table as an uncompressed IPC file under a key, then evicts the least recently used tables.
+
+    """
+    max_bytes = _max_bytes()
+
+    if max_bytes <= 0:
+        return
+
+    if table.nbytes > max_bytes:
+        logging.info(f"Not caching {key}, its {table.nbytes} bytes exceed the cache size of {max_bytes} bytes")
+        return
+
+    path = _cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = None
+
+    try:
+        # Written aside and renamed, tasks on the same worker never map a half written file
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as file:
+            temp_path = file.name
+            with pa.ipc.new_file(file, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logging.warning(f"Failed to cache {key}: {e}")
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return
+
+    evict(max_bytes)
+
+
+def cache_get(key: str) -> pd.DataFrame | None:
+    """
+    Maps a cached table into memory and returns it as a zero-copy, writable DataFrame, None when not cached.
+
+    """
+    if not cache_enabled():
+        return None
+
+    path = _cache_path(key)
+
+    try:
+        # A private mapping: pages are shared until written, writes are copied and never reach the cached file
+        with open(path, "rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        table = pa.ipc.open_file(pa.py_buffer(mapping)).read_all()
+        os.utime(path)  # Marks the table as recently used
+    except (FileNotFoundError, ValueError, pa.ArrowInvalid):
+        return None
+
+    logging.info(f"DataFrame {key} mapped from the worker cache")
+
+    return _writable_view(table.to_pandas(split_blocks=True, self_destruct=False), mapping)
+
+
+def evict(max_bytes: int) -> None:
+    """
+    Removes the least recently used tables until the cache fits in max_bytes.
+
+    """
+    entries = []
+
+    for directory, _, file_names in os.walk(_cache_dir()):
+        for file_name in file_names:
+            if not file_name.endswith(".arrow"):
+                continue
+            try:
+                stat = os.stat(os.path.join(directory, file_name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, os.path.join(directory, file_name)))
+
+    total_bytes = sum(size for _, size, _ in entries)
+
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+
+        # Tasks still mapping the file keep their mapping, only the name goes away
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+        total_bytes -= size
+        logging.info(f"Evicted {path} from the worker cache")
+
+
+def clear_cache(key_prefix: str) -> None:
+    """
+    Removes every cached table under a key prefix, e.g. all tables of a DAG run.
+
+    """
+    path = os.path.join(_cache_dir(), key_prefix.strip("/"))
+
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+        logging.info(f"Cleared the worker cache under {key_prefix}")
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(_cache_dir(), f"{key.strip('/')}.arrow")
+
+
+def _cache_dir() -> str:
+    return os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+
+
+def _max_bytes() -> int:
+    """
+    Returns the configured cache size, capped to a share of the filesystem holding the cache.
+
+    """
+    max_bytes = int(os.environ.get(CACHE_MAX_BYTES_ENV, DEFAULT_CACHE_MAX_BYTES))
+
+    if max_bytes <= 0:
+        return 0
+
+    # The cache directory is created on the first put, its closest existing parent is on the same filesystem
+    directory = _cache_dir()
+    while not os.path.isdir(directory) and os.path.dirname(directory) != directory:
+        directory = os.path.dirname(directory)
+
+    try:
+        filesystem_bytes = shutil.disk_usage(directory).total
+    except OSError:
+        return max_bytes
+
+    return min(max_bytes, int(filesystem_bytes * CACHE_FILESYSTEM_SHARE))
+
+
+def _writable_view(df: pd.DataFrame, mapping: mmap.mmap) -> pd.DataFrame:
+    """
+    Rebuilds the read-only columns Arrow converted without a copy as writable views of the private mapping.
+
+    """
+    base_address = ctypes.addressof(ctypes.c_char.from_buffer(mapping))
+    columns = []
+
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        values = getattr(column.array, "_ndarray", None)
+
+        if values is None or values.flags.writeable or not len(values):
+            columns.append(column)
+            continue
+
+        offset = values.ctypes.data - base_address
+
+        if isinstance(column.dtype, np.dtype) and 0 <= offset <= len(mapping) - values.nbytes:
+            view = np.frombuffer(mapping, dtype=values.dtype, count=len(values), offset=offset)
+            columns.append(pd.Series(view, index=df.index, name=column.name, copy=False))
+        else:
+            # Categoricals and time zone aware columns are not rebuilt, they are copied
+            columns.append(column.copy())
+
+    if not columns:
+        return df
+
+    view_df = pd.concat(columns, axis=1, copy=False)
+    view_df.columns = df.columns
+
+    return view_df
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+from include.s3_utils import get_filesystem
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("etl.anomalies")
+
+
+STATS_COLUMNS = ["count", "mean", "m2"]
+GLOBAL_SEGMENT = "all"
+
+
+def segment_stats(sales_df: pd.DataFrame, segment: str | None = None, by_day: bool = False) -> pd.DataFrame:
+    """
+    Computes the revenue count, mean and sum of squared deviations (m2) of every segment in one grouped pass,
+    per day as well with by_day.
+
+    """
+    keys = sales_df[segment] if segment else pd.Series(GLOBAL_SEGMENT, index=sales_df.index)
+    keys = [keys.rename("segment")]
+
+    if by_day:
+        keys.insert(0, sales_df["order_date"].dt.normalize())
+
+    grouped = sales_df["total_revenue"].groupby(keys)
+    stats_df = grouped.agg(["count", "mean"])
+    stats_df["m2"] = grouped.var(ddof=0) * stats_df["count"]
+
+    return stats_df[STATS_COLUMNS]
+
+
+def merge_stats(stats_df: pd.DataFrame, other_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merges two sets of segment statistics with the parallel form of Welford's update,
+    segments missing on one side keep the statistics of the other.
+
+    """
+    left, right = stats_df.align(other_df, join="outer", fill_value=0)
+    left_count, right_count = left["count"], right["count"]
+    count = left_count + right_count
+    delta = right["mean"] - left["mean"]
+
+    return pd.DataFrame({
+        "count": count,
+        "mean": left["mean"] + delta * (right_count / count),
+        "m2": left["m2"] + right["m2"] + delta ** 2 * (left_count * right_count / count),
+    })[STATS_COLUMNS]
+
+
+def combine_stats(stats_df: pd.DataFrame, level: str | None = "segment") -> pd.DataFrame:
+    """
+    Folds many rows of statistics (e.g. one per day) into one row per segment, vectorized over all segments,
+    or into one global row without a level.
+
+    """
+    keys = stats_df.index.get_level_values(level) if level else pd.Index([GLOBAL_SEGMENT] * len(stats_df))
+    counts = stats_df["count"].to_numpy()
+    means = stats_df["mean"].to_numpy()
+
+    combined = pd.DataFrame({"count": counts, "weighted_mean": counts * means, "m2": stats_df["m2"].to_numpy()})
+    combined = combined.groupby(keys.to_numpy()).sum()
+    combined["mean"] = combined["weighted_mean"] / combined["count"]
+
+    # Spread of the row means around their segment mean, the cross term of the merge
+    deviation = means - combined["mean"].reindex(keys).to_numpy()
+    combined["m2"] += pd.Series(counts * deviation ** 2).groupby(keys.to_numpy()).sum()
+
+    return combined[STATS_COLUMNS].rename_axis("segment")
+
+
+def accumulate_stats(chunks, segment: str | None = None) -> pd.DataFrame:
+    """
+    Streams chunks of sales through the running statistics, only one chunk is held in memory at a time.
+
+    """
+    stats_df = pd.DataFrame(columns=STATS_COLUMNS, dtype=float)
+
+    for chunk in chunks:
+        stats_df = merge_stats(stats_df, segment_stats(chunk, segment))
+
+    return stats_df
+
+
+def rollup_stats(rollup_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Folds the daily revenue count, mean and m2 of the daily rollup into the global revenue statistics.
+
+    """
+    if "revenue_m2" not in rollup_df or rollup_df["revenue_m2"].isna().any():
+        raise ValueError("The daily rollup has days without revenue_mean and revenue_m2, its parts need to be rebuilt")
+
+    daily_stats = pd.DataFrame({
+        "count": rollup_df["order_count"].to_numpy(dtype=float),
+        "mean": rollup_df["revenue_mean"].to_numpy(dtype=float),
+        "m2": rollup_df["revenue_m2"].to_numpy(dtype=float),
+    })
+
+    return combine_stats(daily_stats, level=None)
+
+
+def anomaly_thresholds(stats_df: pd.DataFrame, sigma: float = 3.0, min_count: int = 30) -> tuple:
+    """
+    Returns the revenue threshold of every segment (mean - sigma * std) and the global threshold,
+    used for segments with fewer than min_count orders. With the global statistics only (no segment)
+    there is nothing to fall back from and min_count has no effect.
+
+    """
+    global_threshold = _thresholds(combine_stats(stats_df, level=None), sigma).iloc[0] if len(stats_df) else np.nan
+
+    thresholds = _thresholds(stats_df, sigma).where(stats_df["count"] >= min_count).fillna(global_threshold)
+
+    return thresholds, global_threshold
+
+
+def score_anomalies(sales_df: pd.DataFrame, stats_df: pd.DataFrame, segment: str | None = None,
+                    sigma: float = 3.0, min_count: int = 30) -> pd.DataFrame:
+    """
+    Returns the orders whose revenue is below the threshold of their segment.
+
+    """
+    thresholds, global_threshold = anomaly_thresholds(stats_df, sigma, min_count)
+
+    if segment:
+        order_thresholds = thresholds.reindex(sales_df[segment].to_numpy()).fillna(global_threshold).to_numpy()
+    else:
+        order_thresholds = global_threshold
+
+    return sales_df[sales_df["total_revenue"].to_numpy() < order_thresholds]
+
+
+def append_segment_stats(sales_df: pd.DataFrame, segment: str, store_path: str,
+                         storage_options: dict | None = None) -> pd.DataFrame:
+    """
+    Appends the daily statistics of the days not stored yet and returns the statistics per segment over all stored days.
+
+    """
+    fs = get_filesystem(store_path, storage_options)
+    store_path = store_path.rstrip("/")
+
+    parts = []
+    for part_path in sorted(fs.glob(f"{store_path}/*.parquet")):
+        with fs.open(part_path, "rb") as file:
+            parts.append(pd.read_parquet(file))
+
+    stored_df = pd.concat(parts) if parts else None
+    stored_days = stored_df.index.get_level_values("order_date") if stored_df is not None else []
+
+    # Stored days are never rewritten, as with the daily rollup
+    new_sales_df = sales_df[~sales_df["order_date"].dt.normalize().isin(stored_days)]
+
+    if len(new_sales_df):
+        new_stats_df = segment_stats(new_sales_df, segment, by_day=True)
+        days = new_stats_df.index.get_level_values("order_date")
+        part_path = f"{store_path}/part-{days.min():%Y%m%d}-{days.max():%Y%m%d}.parquet"
+
+        with fs.open(part_path, "wb") as file:
+            new_stats_df.to_parquet(file)
+
+        logging.info(f"Statistics of {len(new_sales_df)} orders by {segment} appended at {part_path}")
+        stored_df = new_stats_df if stored_df is None else pd.concat([stored_df, new_stats_df])
+
+    if stored_df is None:
+        return pd.DataFrame(columns=STATS_COLUMNS, dtype=float)
+
+    return combine_stats(stored_df)
+
+
+def _thresholds(stats_df: pd.DataFrame, sigma: float) -> pd.Series:
+    """
+    Computes mean - sigma * sample standard deviation per row of statistics.
+
+    """
+    variance = stats_df["m2"].clip(lower=0) / (stats_df["count"] - 1)
+
+    return stats_df["mean"] - sigma * np.sqrt(variance.where(stats_df["count"] > 1))
@@ -0,0 +1,119 @@
+import json
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from include.s3_utils import get_filesystem
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("etl.customer_spend")
+
+
+SPEND_INDEX_COLUMNS = ["customer_id", "total_spent", "last_order_date"]
+SPEND_INDEX_FILE = "customer_spend.parquet"
+# Parquet metadata key of the ids of the orders counted at the watermark, so that new orders
+# with the same timestamp are told apart from them. Kept in the index file, both are saved at once
+WATERMARK_ORDERS_KEY = b"watermark_orders"
+
+
+def read_spend_index(store_path: str, storage_options: dict | None = None) -> pd.DataFrame:
+    """
+    Reads the customer spend index (one row per customer), empty when it was not built yet.
+
+    """
+    return _read_index_file(store_path, storage_options)[0]
+
+
+def _read_index_file(store_path: str, storage_options: dict | None = None) -> tuple:
+    """
+    Reads the customer spend index and the ids of the orders counted at its watermark.
+
+    """
+    fs = get_filesystem(store_path, storage_options)
+    index_path = f"{store_path.rstrip('/')}/{SPEND_INDEX_FILE}"
+
+    if not fs.exists(index_path):
+        index_df = pd.DataFrame({
+            "customer_id": pd.Series(dtype="int64"),
+            "total_spent": pd.Series(dtype="float64"),
+            "last_order_date": pd.Series(dtype="datetime64[ns]"),
+        })
+        return index_df, pd.DataFrame({"order_id": pd.Series(dtype="int64")})
+
+    with fs.open(index_path, "rb") as file:
+        table = pq.read_table(file)
+
+    watermark_orders = json.loads((table.schema.metadata or {}).get(WATERMARK_ORDERS_KEY, b"[]"))
+
+    return table.to_pandas(), pd.DataFrame({"order_id": pd.Series(watermark_orders, dtype="int64")})
+
+
+def update_spend_index(sales_df: pd.DataFrame, store_path: str, storage_options: dict | None = None) -> dict:
+    """
+    Adds the orders not counted yet (after the index watermark, its latest order date, or at it but not among
+    the watermark orders) to the cumulative spend of their customers. Nothing is saved: returns the index rows of
+    the customers with new orders ("changed"), the updated "index" and its "watermark_orders", to be saved with
+    save_spend_index once the changed rows are loaded.
+
+    """
+    index_df, watermark_orders_df = _read_index_file(store_path, storage_options)
+    watermark = index_df["last_order_date"].max()
+
+    # Late arrivals before the watermark are not added
+    if pd.isna(watermark):
+        new_sales_df = sales_df
+    else:
+        at_watermark = (sales_df["order_date"] == watermark) & ~sales_df["order_id"].isin(watermark_orders_df["order_id"])
+        new_sales_df = sales_df[(sales_df["order_date"] > watermark) | at_watermark]
+
+    if new_sales_df.empty:
+        logging.info(f"No orders after {watermark} for the customer spend index")
+        return {"changed": index_df.iloc[:0], "index": index_df, "watermark_orders": watermark_orders_df}
+
+    delta_df = new_sales_df.groupby("customer_id").agg(
+        total_spent=("total_revenue", "sum"),
+        last_order_date=("order_date", "max"),
+    )
+
+    index_df = index_df.set_index("customer_id")
+    changed_df = delta_df.assign(
+        total_spent=delta_df["total_spent"].add(index_df["total_spent"].reindex(delta_df.index), fill_value=0.0)
+    )
+
+    # Only the changed customers are rewritten, the others keep their rows
+    index_df = pd.concat([index_df.drop(changed_df.index, errors="ignore"), changed_df]).sort_index()
+
+    new_watermark = index_df["last_order_date"].max()
+    new_watermark_orders = new_sales_df.loc[new_sales_df["order_date"] == new_watermark, ["order_id"]]
+
+    if new_watermark == watermark:
+        new_watermark_orders = pd.concat([watermark_orders_df, new_watermark_orders], ignore_index=True)
+
+    logging.info(f"Customer spend index updated from {len(new_sales_df)} orders: {len(changed_df)} customers changed, {len(index_df)} indexed")
+
+    return {
+        "changed": changed_df.reset_index()[SPEND_INDEX_COLUMNS],
+        "index": index_df.reset_index()[SPEND_INDEX_COLUMNS],
+        "watermark_orders": new_watermark_orders.reset_index(drop=True),
+    }
+
+
+def save_spend_index(index_df: pd.DataFrame, watermark_orders_df: pd.DataFrame, store_path: str,
+                     storage_options: dict | None = None) -> None:
+    """
+    Saves the index and its watermark orders returned by update_spend_index, rerunning the update before the save
+    recomputes the same changes.
+
+    """
+    table = pa.Table.from_pandas(index_df, preserve_index=False)
+    watermark_orders = json.dumps(watermark_orders_df["order_id"].astype("int64").tolist()).encode("utf-8")
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), WATERMARK_ORDERS_KEY: watermark_orders})
+
+    fs = get_filesystem(store_path, storage_options)
+    with fs.open(f"{store_path.rstrip('/')}/{SPEND_INDEX_FILE}", "wb") as file:
+        pq.write_table(table, file)
+
+    logging.info(f"Customer spend index of {len(index_df)} customers saved to {store_path}")
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+from include.etl.sketches import DEFAULT_RELATIVE_ERROR, build_sketches, fold_sketches, merge_sketches, precision_for_error, sketches_to_bytes
+from include.validations.rollup_schema import validate_post_daily_rollup_schema
+from include.s3_utils import get_filesystem
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("etl.daily_rollup")
+
+
+DAILY_ROLLUP_COLUMNS = ["order_date", "total_revenue", "order_count", "revenue_mean", "revenue_m2", "customer_ids", "customer_sketch"]
+
+# Days with more distinct customers keep a distinct-count sketch instead of their customer ids
+DEFAULT_EXACT_ID_LIMIT = 100_000
+
+
+def build_daily_rollup(sales_df: pd.DataFrame, relative_error: float = DEFAULT_RELATIVE_ERROR,
+                       exact_id_limit: int = DEFAULT_EXACT_ID_LIMIT) -> pd.DataFrame:
+    """
+    Rolls cleaned sales up to one row per day: revenue, order count, revenue mean and m2 (Welford) and the day's customers,
+    as their ids up to exact_id_limit distinct customers and as a mergeable sketch above it.
+
+    """
+    logging.info("Building daily sales rollup")
+
+    days_df = sales_df.assign(order_date=sales_df["order_date"].dt.normalize())
+    grouped = days_df.groupby("order_date")
+
+    rollup_df = grouped.agg(
+        total_revenue=("total_revenue", "sum"),
+        order_count=("total_revenue", "size"),
+        revenue_mean=("total_revenue", "mean"),
+    ).reset_index()
+    # Sum of squared deviations from the day's mean, folded across days with the anomaly statistics merge
+    rollup_df["revenue_m2"] = (grouped["total_revenue"].var(ddof=0) * rollup_df["order_count"].to_numpy()).to_numpy()
+    customer_ids = grouped["customer_id"].unique()
+    sketched = (customer_ids.map(len) > exact_id_limit).to_numpy()
+
+    rollup_df["customer_ids"] = customer_ids.to_numpy()
+    rollup_df["customer_sketch"] = None
+
+    if sketched.any():
+        days_codes = pd.Index(rollup_df["order_date"]).get_indexer(days_df["order_date"])
+        in_sketched_day = sketched[days_codes]
+        _, sketched_codes = np.unique(days_codes[in_sketched_day], return_inverse=True)
+
+        sketches = build_sketches(days_df["customer_id"].to_numpy()[in_sketched_day], sketched_codes, int(sketched.sum()),
+                                  precision_for_error(relative_error))
+
+        rollup_df.loc[sketched, "customer_ids"] = None
+        rollup_df.loc[sketched, "customer_sketch"] = pd.Series(sketches_to_bytes(sketches), index=rollup_df.index[sketched], dtype=object)
+
+        logging.info(f"{sketched.sum()} days with more than {exact_id_limit} customers keep a sketch instead of their ids")
+
+    rollup_df = validate_post_daily_rollup_schema(rollup_df)
+
+    logging.info(f"Daily sales rollup built: {len(rollup_df)} days from {len(sales_df)} orders")
+
+    return rollup_df
+
+
+def read_daily_rollup(store_path: str, storage_options: dict | None = None) -> pd.DataFrame:
+    """
+    Reads every part of the stored daily rollup, empty when nothing was appended yet.
+
+    """
+    fs = get_filesystem(store_path, storage_options)
+    part_paths = sorted(fs.glob(f"{store_path.rstrip('/')}/*.parquet"))
+
+    if not part_paths:
+        return pd.DataFrame(columns=DAILY_ROLLUP_COLUMNS)
+
+    parts = []
+    for part_path in part_paths:
+        with fs.open(part_path, "rb") as file:
+            parts.append(pd.read_parquet(file))
+
+    return pd.concat(parts, ignore_index=True).sort_values("order_date", ignore_index=True)
+
+
+def append_daily_rollup(rollup_df: pd.DataFrame, store_path: str, storage_options: dict | None = None) -> pd.DataFrame:
+    """
+    Appends the days not stored yet as a new part of the rollup and returns the full rollup.
+
+    """
+    stored_df = read_daily_rollup(store_path, storage_options)
+    stored_days = rollup_df["order_date"].isin(stored_df["order_date"])
+    new_days_df = rollup_df[~stored_days]
+
+    if stored_days.any():
+        # Stored days are never rewritten, orders arriving late for them are not counted
+        logging.warning(
+            f"{stored_days.sum()} days are already in the rollup at {store_path}, keeping the stored rows: "
+            f"{rollup_df.loc[stored_days, 'order_count'].sum()} orders of these days are dropped"
+        )
+
+    if new_days_df.empty:
+        return stored_df
+
+    first_day, last_day = new_days_df["order_date"].min(), new_days_df["order_date"].max()
+    part_path = f"{store_path.rstrip('/')}/part-{first_day:%Y%m%d}-{last_day:%Y%m%d}.parquet"
+
+    fs = get_filesystem(store_path, storage_options)
+    with fs.open(part_path, "wb") as file:
+        new_days_df.to_parquet(file, index=False)
+
+    logging.info(f"{len(new_days_df)} new days appended to the rollup at {part_path}")
+
+    if stored_df.empty:
+        return new_days_df.reset_index(drop=True)
+
+    return pd.concat([stored_df, new_days_df], ignore_index=True).sort_values("order_date", ignore_index=True)
+
+
+def count_unique_customers(customer_ids: pd.Series) -> int | None:
+    """
+    Counts the distinct customers over the customer id arrays of several days, None when a day only kept its sketch.
+
+    """
+    if customer_ids.empty:
+        return 0
+
+    if customer_ids.isna().any():
+        return None
+
+    return len(np.unique(np.concatenate(customer_ids.to_list())))
+
+
+def monthly_customer_sketches(rollup_df: pd.DataFrame, relative_error: float = DEFAULT_RELATIVE_ERROR) -> pd.DataFrame:
+    """
+    Builds one distinct-customer sketch per month from the customer ids and sketches of its days, labelled with the month end.
+    Stored sketches with a lower precision than relative_error needs lower the precision of all sketches.
+
+    """
+    months = rollup_df["order_date"].dt.to_period("M")
+    codes, uniques = pd.factorize(months, sort=True)
+
+    has_ids = rollup_df["customer_ids"].notna().to_numpy()
+    stored_sketches = rollup_df["customer_sketch"].to_numpy()[~has_ids]
+    precision = min([precision_for_error(relative_error)] + [int(np.log2(len(sketch))) for sketch in stored_sketches])
+
+    id_days = rollup_df["customer_ids"].to_numpy()[has_ids]
+    lengths = np.array([len(ids) for ids in id_days], dtype=np.int64)
+    customer_ids = np.concatenate(id_days) if len(id_days) else np.array([], dtype=np.int64)
+
+    sketches = build_sketches(customer_ids, np.repeat(codes[has_ids], lengths), len(uniques), precision)
+
+    if len(stored_sketches):
+        folded = np.vstack([fold_sketches(np.frombuffer(sketch, dtype=np.uint8), precision) for sketch in stored_sketches])
+        sketches = np.maximum(sketches, merge_sketches(folded, codes[~has_ids], len(uniques)))
+
+    return pd.DataFrame({
+        "order_date": uniques.to_timestamp(how="end").normalize(),
+        "customer_sketch": sketches_to_bytes(sketches),
+    })
@@ -1,31 +1,19 @@
+import re
+
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 
-from airflow.providers.amazon.aws.hooks.s3 import S3Hook  # type: ignore
+from include.s3_utils import get_s3_filesystem, get_storage_options
 from ..logger import setup_logger
 
 
 logging = setup_logger("etl.extract_data")
 
 
-def get_storage_options(aws_conn_id: str):
-    """
-    Retrieves storage options for accessing S3 using the provided S3Hook.
-
-    """
-    s3_hook = S3Hook(aws_conn_id=aws_conn_id)
-    credentials = s3_hook.get_credentials()
-
-    storage_options = {
-        "key": credentials.access_key,
-        "secret": credentials.secret_key,
-    }
-
-    return s3_hook, storage_options
-
-
-def extract_data_from_s3(bucket: str, folder: str, aws_conn_id: str) -> dict:
+def extract_data_from_s3(bucket: str, folder: str, aws_conn_id: str, routes: dict, max_workers: int = 8) -> dict:
     """
-    Extracts data from CSV files stored in an S3 bucket and folder.
+    Extracts the CSV files routed to each dataset concurrently, through one shared S3 filesystem.
 
     """
     s3_hook, storage_options = get_storage_options(aws_conn_id)
@@ -34,27 +22,69 @@ def extract_data_from_s3(bucket: str, folder: str, aws_conn_id: str) -> dict:
     if not keys:
         raise ValueError(f"No files found in bucket '{bucket}' with prefix '{folder}'")
 
-    dfs = {}
+    routed_keys = route_keys(keys, routes)
 
-    for key in keys:
-        if not key.lower().endswith(".csv"):
-            logging.info(f"Skipping non-csv file {key}")
-            continue
+    fs = get_s3_filesystem(aws_conn_id)
+    paths = list(dict.fromkeys(f"s3://{bucket}/{key}" for dataset_keys in routed_keys.values() for key in dataset_keys))
 
-        s3_path = f"s3://{bucket}/{key}"
+    def read_csv(s3_path: str) -> pd.DataFrame:
         logging.info(f"Extracting data from {s3_path}")
 
         try:
-                df = pd.read_csv(s3_path, storage_options=storage_options)
-                if df.empty:
-                    logging.warning(f"No data found in {s3_path}")
-                    continue
+            with fs.open(s3_path, "rb") as file:
+                df = pd.read_csv(file)
         except Exception as e:
             logging.error(f"Error reading {s3_path}: {e}")
             raise
 
-        dfs[key] = df
-    
+        if df.empty:
+            logging.warning(f"No data found in {s3_path}")
+
+        return df
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as executor:
+        frames = dict(zip(paths, executor.map(read_csv, paths)))
+
+    dfs = {}
+
+    for dataset, dataset_keys in routed_keys.items():
+        dataset_frames = [frames[f"s3://{bucket}/{key}"] for key in dataset_keys]
+        dataset_frames = [df for df in dataset_frames if not df.empty]
+
+        if not dataset_frames:
+            raise ValueError(f"No data found for dataset '{dataset}' in s3://{bucket}/{folder}")
+
+        dfs[dataset] = pd.concat(dataset_frames, ignore_index=True) if len(dataset_frames) > 1 else dataset_frames[0]
+        logging.info(f"Dataset '{dataset}' extracted from {len(dataset_keys)} file(s), {len(dfs[dataset])} rows")
+
     return dfs
 
-    
\ No newline at end of file
+
+def route_keys(keys: list, routes: dict) -> dict:
+    """
+    Routes CSV keys to datasets by matching their file names against each dataset's pattern.
+
+    """
+    routed_keys = {dataset: [] for dataset in routes}
+
+    for key in sorted(keys):
+        file_name = key.rsplit("/", 1)[-1]
+
+        if not file_name.lower().endswith(".csv"):
+            logging.info(f"Skipping non-csv file {key}")
+            continue
+
+        datasets = [dataset for dataset, pattern in routes.items() if re.search(pattern, file_name, re.IGNORECASE)]
+
+        if not datasets:
+            logging.info(f"Skipping {key}, no dataset is routed to it")
+            continue
+
+        for dataset in datasets:
+            routed_keys[dataset].append(key)
+
+    missing = [dataset for dataset, dataset_keys in routed_keys.items() if not dataset_keys]
+    if missing:
+        raise ValueError(f"No files found for datasets {missing}")
+
+    return routed_keys
@@ -0,0 +1,137 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from include.validations.forecast_schema import validate_post_forecast_schema
+from include.s3_utils import get_filesystem
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("etl.forecast")
+
+
+STATE_FILE = "_state.json"
+
+
+def daily_revenue(rollup_df: pd.DataFrame) -> pd.Series:
+    """
+    Resamples the rollup to a contiguous daily revenue series, days without orders count as zero.
+
+    """
+    series = rollup_df.set_index("order_date")["total_revenue"].sort_index()
+
+    return series.asfreq("D", fill_value=0.0) if len(series) else series
+
+
+def rolling_window_means(values: np.ndarray, windows: list, tail: np.ndarray | None = None, days_before: int = 0) -> np.ndarray:
+    """
+    Computes the trailing mean of every window for each value in one vectorized pass over cumulative sums.
+    tail holds the last days before values (at least max(windows) - 1 of them) and days_before their total count.
+
+    """
+    tail = np.asarray(tail if tail is not None else [], dtype=float)
+    window_sizes = np.asarray(windows)[:, None]
+
+    cumulative = np.concatenate([[0.0], np.cumsum(np.concatenate([tail, values]))])
+    ends = np.arange(len(tail), len(tail) + len(values))[None, :] + 1
+    starts = np.maximum(ends - window_sizes, 0)
+
+    sums = cumulative[ends] - cumulative[starts]
+    counts = np.minimum(window_sizes, days_before - len(tail) + ends)
+
+    return sums / counts
+
+
+def forecast_new_days(rollup_df: pd.DataFrame, windows: list, horizon: int = 1, state: dict | None = None) -> tuple:
+    """
+    Forecasts the days after the state (every day without one): each day's window means forecast
+    the revenue horizon days later. Returns the new forecast rows and the updated state.
+
+    """
+    series = daily_revenue(rollup_df)
+
+    if state is not None:
+        known = series[series.index <= pd.Timestamp(state["last_date"])]
+
+        # Days backfilled into the rollup after they were forecast invalidate the state
+        if len(known) != state["history_days"] or not np.isclose(known.sum(), state["history_sum"]):
+            logging.info("Daily revenue changed before the last forecast day, recomputing the forecast")
+            state = None
+
+    if state is None:
+        state = {"last_date": None, "history_days": 0, "history_sum": 0.0, "tail": []}
+        new_days = series
+    else:
+        new_days = series[series.index > pd.Timestamp(state["last_date"])]
+
+    means = rolling_window_means(new_days.to_numpy(dtype=float), windows, state["tail"], state["history_days"])
+
+    forecast_df = pd.DataFrame({
+        "order_date": new_days.index,
+        "total_revenue": new_days.to_numpy(dtype=float),
+        "sales_forecast": means[0],
+        "forecast_date": new_days.index + pd.Timedelta(days=horizon),
+    })
+    for window, window_means in zip(windows, means):
+        forecast_df[f"sales_forecast_{window}d"] = window_means
+
+    tail_size = max(windows) - 1
+    tail = np.concatenate([np.asarray(state["tail"], dtype=float), new_days.to_numpy(dtype=float)])
+    last_date = new_days.index[-1] if len(new_days) else state["last_date"]
+
+    new_state = {
+        "last_date": pd.Timestamp(last_date).isoformat() if last_date is not None else None,
+        "history_days": state["history_days"] + len(new_days),
+        "history_sum": float(state["history_sum"] + new_days.sum()),
+        "tail": tail[-tail_size:].tolist() if tail_size else [],
+        "windows": list(windows),
+        "horizon": horizon,
+    }
+
+    return forecast_df, new_state
+
+
+def update_forecast_store(rollup_df: pd.DataFrame, store_path: str, storage_options: dict | None = None,
+                          windows: list = (7,), horizon: int = 1) -> pd.DataFrame:
+    """
+    Forecasts only the days added since the previous run, appends them to the store and returns the full forecast.
+
+    """
+    logging.info(f"Updating sales forecast at {store_path} for windows {list(windows)} and horizon {horizon}")
+
+    fs = get_filesystem(store_path, storage_options)
+    store_path = store_path.rstrip("/")
+    state_path = f"{store_path}/{STATE_FILE}"
+
+    state = json.loads(fs.cat_file(state_path)) if fs.exists(state_path) else None
+    if state is not None and (state.get("windows") != list(windows) or state.get("horizon") != horizon):
+        logging.info("Forecast windows or horizon changed, recomputing the forecast")
+        state = None
+
+    forecast_df, new_state = forecast_new_days(rollup_df, list(windows), horizon, state)
+
+    if len(forecast_df) == new_state["history_days"]:
+        # Forecast from the first day on, the parts of a previous forecast are replaced as a whole
+        for part_path in fs.glob(f"{store_path}/*.parquet"):
+            fs.rm(part_path)
+
+    if len(forecast_df):
+        forecast_df = validate_post_forecast_schema(forecast_df)
+        first_day, last_day = forecast_df["order_date"].min(), forecast_df["order_date"].max()
+
+        with fs.open(f"{store_path}/part-{first_day:%Y%m%d}-{last_day:%Y%m%d}.parquet", "wb") as file:
+            forecast_df.to_parquet(file, index=False)
+
+    # Written after the part, a failed run forecasts the same days again into the same part
+    fs.pipe_file(state_path, json.dumps(new_state).encode("utf-8"))
+
+    logging.info(f"Sales forecast updated with {len(forecast_df)} new days")
+
+    parts = []
+    for part_path in sorted(fs.glob(f"{store_path}/*.parquet")):
+        with fs.open(part_path, "rb") as file:
+            parts.append(pd.read_parquet(file))
+
+    return pd.concat(parts, ignore_index=True) if parts else forecast_df
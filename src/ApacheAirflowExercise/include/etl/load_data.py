@@ -1,16 +1,33 @@
+import os
+import tempfile
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 
 from airflow.providers.snowflake.hooks.snowflake import SnowflakeHook  # type: ignore
+from include.etl.stage_loaders import SnowflakeStageLoader, StageLoader
 from ..logger import setup_logger
 
 
 logging = setup_logger("etl.load_data")
 
 
-def load_data_to_snowflake(df: pd.DataFrame, database: str, schema: str, table: str, snowflake_conn_id: str):
+ROW_HASH_COLUMN = "row_hash"
+CHANGE_OP_COLUMN = "change_op"
+
+
+def load_data_to_snowflake(df: pd.DataFrame, database: str, schema: str, table: str, snowflake_conn_id: str,
+                           keys: list | None = None, delete_missing: bool = True,
+                           chunk_size: int = 500_000, parallelism: int = 4, compression: str = "snappy"):
     """
-    Loads the provided DataFrame into a Snowflake table.
+    Loads the provided DataFrame into a Snowflake table through a stage and COPY INTO,
+    merging only the changed rows when business keys are given.
 
     """
     logging.info(f"Loading data into Snowflake table {table}")
@@ -20,18 +37,141 @@ def load_data_to_snowflake(df: pd.DataFrame, database: str, schema: str, table:
 
     try:
         hook = SnowflakeHook(snowflake_conn_id=snowflake_conn_id)
-        engine = hook.get_sqlalchemy_engine()
-
-        df.to_sql(
-            name=table,
-            con=engine,
-            schema=schema,
-            index=False,
-            if_exists="replace",
-            method="multi",
-        )
+        connection = hook.get_conn()
+
+        try:
+            loader = SnowflakeStageLoader(connection)
+
+            if keys:
+                merge_load_dataframe(df, loader, database, schema, table, keys, delete_missing, chunk_size, parallelism, compression)
+            else:
+                bulk_load_dataframe(df, loader, database, schema, table, chunk_size, parallelism, compression)
+        finally:
+            connection.close()
     except Exception as e:
         logging.error(f"Error loading data into Snowflake table {table}: {e}")
         raise
 
-    logging.info(f"Data loaded successfully into Snowflake table {table}")
\ No newline at end of file
+    logging.info(f"Data loaded successfully into Snowflake table {table}")
+
+
+def bulk_load_dataframe(df: pd.DataFrame, loader: StageLoader, database: str, schema: str, table: str,
+                        chunk_size: int = 500_000, parallelism: int = 4, compression: str = "snappy") -> int:
+    """
+    Writes a DataFrame as compressed Parquet chunks, uploads them to the loader's stage in parallel
+    and replaces the table with one COPY INTO. Returns the number of rows loaded.
+
+    """
+    arrow_schema = pa.Schema.from_pandas(df, preserve_index=False)
+    table_name = loader.qualified_name(database, schema, table)
+    stage_prefix = f"{table}/{uuid.uuid4().hex}"
+
+    loader.prepare_stage(database, schema)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+
+        def write_and_upload(start: int) -> None:
+            path = os.path.join(tmp_dir, f"part-{start // chunk_size:05d}.parquet")
+            chunk = pa.Table.from_pandas(df.iloc[start:start + chunk_size], schema=arrow_schema, preserve_index=False)
+
+            # Microsecond timestamps, the precision COPY INTO reads from Parquet
+            pq.write_table(chunk, path, compression=compression, coerce_timestamps="us", allow_truncated_timestamps=True)
+            loader.upload(path, stage_prefix)
+            os.remove(path)
+
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            list(executor.map(write_and_upload, range(0, len(df), chunk_size)))
+
+    loader.create_table(table_name, arrow_schema, replace=True)
+
+    if df.empty:
+        # Nothing was staged, COPY INTO would find no files
+        logging.info(f"{table_name} replaced by an empty table")
+        return 0
+
+    loaded_rows = loader.copy_into(table_name, stage_prefix)
+
+    logging.info(f"{loaded_rows} rows copied into {table_name} from {-(-len(df) // chunk_size)} staged files")
+
+    return loaded_rows
+
+
+def merge_load_dataframe(df: pd.DataFrame, loader: StageLoader, database: str, schema: str, table: str, keys: list,
+                         delete_missing: bool = True, chunk_size: int = 500_000, parallelism: int = 4,
+                         compression: str = "snappy") -> dict:
+    """
+    Diffs the row hashes of a DataFrame against the loaded ones and applies only the inserted, updated
+    and deleted rows with one MERGE. Returns the number of rows per change.
+
+    """
+    hashed_df = df.assign(**{ROW_HASH_COLUMN: row_hashes(df)})
+    columns = list(hashed_df.columns)
+    table_name = loader.qualified_name(database, schema, table)
+    table_columns = loader.table_columns(table_name)
+
+    if table_columns == list(df.columns):
+        # Targets loaded before merge mode have no hashes yet, their rows are matched by key and rewritten with one
+        logging.info(f"Adding the {ROW_HASH_COLUMN} column to {table_name}")
+        loader.add_column(table_name, ROW_HASH_COLUMN, pa.int64())
+        table_columns = columns
+
+    if table_columns != columns or hashed_df.duplicated(subset=keys).any():
+        if table_columns is not None and not delete_missing:
+            # The frame only holds part of the rows, reloading the table from it would drop the others
+            raise ValueError(f"Cannot merge into {table_name} on {keys}: the columns differ or the keys are duplicated")
+
+        # First load, changed columns or keys that do not identify rows: reload the whole table
+        logging.info(f"Reloading {table_name} entirely, its rows cannot be merged on {keys}")
+        loaded_rows = bulk_load_dataframe(hashed_df, loader, database, schema, table, chunk_size, parallelism, compression)
+        return {"inserted": loaded_rows, "updated": 0, "deleted": 0}
+
+    key_columns = ", ".join(loader.quote(key) for key in [*keys, ROW_HASH_COLUMN])
+    loaded = pd.DataFrame(loader.execute(f"SELECT {key_columns} FROM {table_name}"), columns=[*keys, ROW_HASH_COLUMN])
+    loaded = loaded.astype({**{key: hashed_df[key].dtype for key in keys}, ROW_HASH_COLUMN: "Int64"})
+
+    current = hashed_df[[*keys, ROW_HASH_COLUMN]].merge(loaded, on=keys, how="left", suffixes=("", "_loaded"), indicator=True)
+    is_new = (current["_merge"] == "left_only").to_numpy()
+    # Loaded rows without a hash yet count as changed
+    is_changed = ~is_new & (current[ROW_HASH_COLUMN] != current[f"{ROW_HASH_COLUMN}_loaded"]).fillna(True).to_numpy()
+
+    changes = hashed_df[is_new | is_changed].assign(**{CHANGE_OP_COLUMN: np.where(is_new[is_new | is_changed], "I", "U")})
+
+    if delete_missing:
+        missing = loaded[keys].merge(hashed_df[keys], on=keys, how="left", indicator=True)
+        deletes = missing.loc[missing["_merge"] == "left_only", keys].assign(**{CHANGE_OP_COLUMN: "D"})
+    else:
+        deletes = pd.DataFrame(columns=[*keys, CHANGE_OP_COLUMN])
+
+    counts = {"inserted": int(is_new.sum()), "updated": int(is_changed.sum()), "deleted": len(deletes)}
+
+    if not any(counts.values()):
+        logging.info(f"No changes to load into {table_name}")
+        return counts
+
+    staging_table = f"{table}_staging"
+    staging_name = loader.qualified_name(database, schema, staging_table)
+    staged_df = changes
+
+    if len(deletes):
+        # Nullable integers, so the empty columns of deleted rows do not turn hashes and ids into floats
+        integer_columns = changes.select_dtypes("integer").columns
+        staged_df = pd.concat([changes.astype({column: "Int64" for column in integer_columns}), deletes], ignore_index=True)
+
+    bulk_load_dataframe(staged_df, loader, database, schema, staging_table, chunk_size, parallelism, compression)
+
+    try:
+        loader.merge_into(table_name, staging_name, keys, columns, CHANGE_OP_COLUMN)
+    finally:
+        loader.drop_table(staging_name)
+
+    logging.info(f"Changes merged into {table_name}: {counts}")
+
+    return counts
+
+
+def row_hashes(df: pd.DataFrame) -> pd.Series:
+    """
+    Hashes the content of every row, the same values and dtypes always give the same hash.
+
+    """
+    return pd.Series(pd.util.hash_pandas_object(df, index=False).to_numpy().view(np.int64), index=df.index)
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from include.timestamps import parse_timestamps
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("etl.partitioning")
+
+
+def partition_by_month(sales_df: pd.DataFrame, date_column: str = "order_date") -> list:
+    """
+    Splits raw sales into one partition per order month, rows keep their index so the partitions
+    can be put back in input order. Rows without a parseable date form their own partition.
+
+    """
+    months = parse_timestamps(sales_df[date_column]).dt.to_period("M")
+    partitions = [partition for _, partition in sales_df.groupby(months.to_numpy(), sort=True, dropna=False)]
+
+    logging.info(f"Sales split into {len(partitions)} monthly partitions of {len(sales_df)} rows")
+
+    return partitions
+
+
+def combine_partitions(partitions, unique_columns: list | None = None) -> pd.DataFrame:
+    """
+    Concatenates partial results back into one DataFrame in input order, checking that
+    unique_columns are still unique across partitions.
+
+    """
+    combined_df = pd.concat(list(partitions)).sort_index(kind="stable")
+
+    for column in unique_columns or []:
+        if not combined_df[column].is_unique:
+            raise ValueError(f"Column '{column}' has duplicate values across partitions")
+
+    logging.info(f"{len(combined_df)} rows combined from partitions")
+
+    return combined_df
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("etl.sketches")
+
+
+# HyperLogLog distinct-count sketches: 2^precision one-byte registers per sketch,
+# merged by taking the register-wise maximum
+DEFAULT_RELATIVE_ERROR = 0.01
+MIN_PRECISION, MAX_PRECISION = 4, 18
+
+
+def precision_for_error(relative_error: float = DEFAULT_RELATIVE_ERROR) -> int:
+    """
+    Returns the smallest precision whose standard error (1.04 / sqrt(2^precision)) is within relative_error.
+
+    """
+    precision = int(np.ceil(2 * np.log2(1.04 / relative_error)))
+
+    return min(max(precision, MIN_PRECISION), MAX_PRECISION)
+
+
+def build_sketches(values: np.ndarray, group_codes: np.ndarray, n_groups: int, precision: int) -> np.ndarray:
+    """
+    Builds one sketch per group in one vectorized pass, group_codes gives the group (0 to n_groups - 1) of each value.
+    Returns a (n_groups, 2^precision) register array.
+
+    """
+    hashes = pd.util.hash_array(np.asarray(values))
+    register_index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+
+    # Rank of the first set bit after the index bits, bounded when all of them are zero
+    ranks = np.minimum(_leading_zeros(hashes << np.uint64(precision)) + 1, 64 - precision + 1).astype(np.uint8)
+
+    registers = np.zeros((n_groups, 1 << precision), dtype=np.uint8)
+    np.maximum.at(registers, (np.asarray(group_codes, dtype=np.int64), register_index), ranks)
+
+    return registers
+
+
+def merge_sketches(sketches: np.ndarray, group_codes: np.ndarray | None = None, n_groups: int = 1) -> np.ndarray:
+    """
+    Merges sketches of the same precision, all of them into one or, with group_codes, one per group.
+
+    """
+    sketches = np.atleast_2d(sketches)
+
+    if group_codes is None:
+        return sketches.max(axis=0)
+
+    merged = np.zeros((n_groups, sketches.shape[1]), dtype=np.uint8)
+    np.maximum.at(merged, np.asarray(group_codes, dtype=np.int64), sketches)
+
+    return merged
+
+
+def fold_sketches(sketches: np.ndarray, precision: int) -> np.ndarray:
+    """
+    Folds sketches down to a lower precision, so sketches built with different precisions can be merged.
+    The index bits dropped from a register lead the bits its rank is counted from.
+
+    """
+    sketches = np.atleast_2d(sketches)
+    shift = int(np.log2(sketches.shape[1])) - precision
+
+    if shift <= 0:
+        return sketches
+
+    dropped_bits = np.arange(sketches.shape[1]) & ((1 << shift) - 1)
+    dropped_rank = shift - np.floor(np.log2(np.maximum(dropped_bits, 1))).astype(np.int64)
+
+    ranks = np.where(dropped_bits > 0, dropped_rank, sketches.astype(np.int64) + shift)
+    ranks = np.where(sketches > 0, np.minimum(ranks, 64 - precision + 1), 0).astype(np.uint8)
+
+    return ranks.reshape(len(sketches), 1 << precision, 1 << shift).max(axis=2)
+
+
+def estimate_distinct(sketches: np.ndarray) -> np.ndarray:
+    """
+    Estimates the distinct count of every sketch, with linear counting for small cardinalities.
+
+    """
+    sketches = np.atleast_2d(sketches)
+    registers = sketches.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / registers)
+
+    estimates = alpha * registers ** 2 / np.sum(np.exp2(-sketches.astype(np.float64)), axis=1)
+    empty_registers = np.count_nonzero(sketches == 0, axis=1)
+
+    small = (estimates <= 2.5 * registers) & (empty_registers > 0)
+    with np.errstate(divide="ignore"):
+        linear_counts = registers * np.log(registers / np.maximum(empty_registers, 1))
+
+    return np.where(small, linear_counts, estimates)
+
+
+def sketches_to_bytes(sketches: np.ndarray) -> list:
+    """
+    Serializes sketches to one bytes value each, to store them in a DataFrame or Parquet column.
+
+    """
+    return [sketch.tobytes() for sketch in np.atleast_2d(sketches)]
+
+
+def sketches_from_bytes(values) -> np.ndarray:
+    """
+    Reads sketches serialized by sketches_to_bytes back into a register array.
+
+    """
+    return np.stack([np.frombuffer(value, dtype=np.uint8) for value in values])
+
+
+def period_distinct_counts(sketch_df: pd.DataFrame, freq: str, date_column: str = "order_date",
+                           sketch_column: str = "customer_sketch") -> pd.DataFrame:
+    """
+    Merges the sketches of a DataFrame (e.g. one per month) into longer periods, e.g. "Q" or "Y",
+    and estimates the distinct count of every period.
+
+    """
+    periods = sketch_df[date_column].dt.to_period(freq)
+    codes, uniques = pd.factorize(periods, sort=True)
+
+    merged = merge_sketches(sketches_from_bytes(sketch_df[sketch_column]), codes, len(uniques))
+
+    return pd.DataFrame({
+        date_column: uniques.to_timestamp(how="end").normalize(),
+        "distinct_count": np.rint(estimate_distinct(merged)).astype(np.int64),
+        sketch_column: sketches_to_bytes(merged),
+    })
+
+
+def _leading_zeros(values: np.ndarray) -> np.ndarray:
+    """
+    Counts the leading zero bits of 64 bit unsigned integers with a vectorized binary search.
+
+    """
+    values = values.copy()
+    zeros = np.zeros(len(values), dtype=np.int64)
+
+    for shift in (32, 16, 8, 4, 2, 1):
+        high_bits_clear = values < (np.uint64(1) << np.uint64(64 - shift))
+        zeros[high_bits_clear] += shift
+        values[high_bits_clear] <<= np.uint64(shift)
+
+    return zeros + (values == 0)
@@ -0,0 +1,207 @@
+import os
+import re
+import shutil
+
+from abc import ABC, abstractmethod
+
+import pyarrow as pa
+
+
+class StageLoader(ABC):
+    """
+    SQL and stage layer of the bulk loader: uploads Parquet files to a stage, copies them into tables and merges changes.
+
+    """
+
+    # (Arrow type check, SQL type) pairs, the first match wins, unmatched types become VARCHAR
+    TYPES = []
+    TIMESTAMP_TYPES = ("TIMESTAMP", "TIMESTAMPTZ")
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql: str) -> list:
+        """
+        Runs one statement and returns its result rows (empty for statements without results).
+
+        """
+        cursor = self.connection.cursor()
+
+        try:
+            cursor.execute(sql)
+            return cursor.fetchall() if cursor.description else []
+        finally:
+            cursor.close()
+
+    def quote(self, name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def qualified_name(self, database: str, schema: str, table: str) -> str:
+        return ".".join(self.quote(part) for part in [database, schema, table])
+
+    def column_type(self, arrow_type: pa.DataType) -> str:
+        if pa.types.is_timestamp(arrow_type):
+            return self.TIMESTAMP_TYPES[1] if arrow_type.tz else self.TIMESTAMP_TYPES[0]
+
+        for matches, sql_type in self.TYPES:
+            if matches(arrow_type):
+                return sql_type
+
+        return "VARCHAR"
+
+    def create_table(self, table_name: str, schema: pa.Schema, replace: bool = True) -> None:
+        """
+        Creates a table with the columns of an Arrow schema.
+
+        """
+        columns = ", ".join(f"{self.quote(field.name)} {self.column_type(field.type)}" for field in schema)
+        create = "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE IF NOT EXISTS"
+
+        self.execute(f"{create} {table_name} ({columns})")
+
+    def table_columns(self, table_name: str) -> list | None:
+        """
+        Returns the lowercase column names of a table, None when it does not exist.
+
+        """
+        cursor = self.connection.cursor()
+
+        try:
+            cursor.execute(f"SELECT * FROM {table_name} LIMIT 0")
+            return [column[0].lower() for column in cursor.description]
+        except Exception:
+            return None
+        finally:
+            cursor.close()
+
+    def add_column(self, table_name: str, column: str, arrow_type: pa.DataType) -> None:
+        self.execute(f"ALTER TABLE {table_name} ADD COLUMN {self.quote(column)} {self.column_type(arrow_type)}")
+
+    def drop_table(self, table_name: str) -> None:
+        self.execute(f"DROP TABLE IF EXISTS {table_name}")
+
+    def merge_into(self, table_name: str, staging_name: str, keys: list, columns: list, op_column: str) -> int:
+        """
+        Applies the staged changes to a table with one MERGE: deletes, updates and inserts by key.
+
+        """
+        on = " AND ".join(f"t.{self.quote(key)} = s.{self.quote(key)}" for key in keys)
+        updates = ", ".join(f"{self.quote(column)} = s.{self.quote(column)}" for column in columns if column not in keys)
+        update_clause = f"WHEN MATCHED THEN UPDATE SET {updates} " if updates else ""
+        names = ", ".join(self.quote(column) for column in columns)
+        values = ", ".join(f"s.{self.quote(column)}" for column in columns)
+        op = f"s.{self.quote(op_column)}"
+
+        rows = self.execute(
+            f"MERGE INTO {table_name} AS t USING {staging_name} AS s ON {on} "
+            f"WHEN MATCHED AND {op} = 'D' THEN DELETE "
+            f"{update_clause}"
+            f"WHEN NOT MATCHED AND {op} <> 'D' THEN INSERT ({names}) VALUES ({values})"
+        )
+
+        # Snowflake returns one count per action, DuckDB the total
+        return sum(int(value) for value in rows[0]) if rows else 0
+
+    @abstractmethod
+    def prepare_stage(self, database: str, schema: str) -> None:
+        """
+        Creates the stage the Parquet files are uploaded to.
+
+        """
+
+    @abstractmethod
+    def upload(self, local_path: str, stage_prefix: str) -> None:
+        """
+        Uploads one local file under a prefix of the stage.
+
+        """
+
+    @abstractmethod
+    def copy_into(self, table_name: str, stage_prefix: str) -> int:
+        """
+        Copies every file under a prefix of the stage into a table and returns the number of rows loaded.
+
+        """
+
+
+class SnowflakeStageLoader(StageLoader):
+    """
+    Loads through a temporary Snowflake stage with PUT and COPY INTO.
+
+    """
+
+    STAGE_NAME = "ETL_LOAD_STAGE"
+    TYPES = [
+        (pa.types.is_boolean, "BOOLEAN"),
+        (pa.types.is_integer, "NUMBER(38, 0)"),
+        (pa.types.is_floating, "FLOAT"),
+        (pa.types.is_decimal, "NUMBER(38, 10)"),
+        (pa.types.is_date, "DATE"),
+    ]
+    TIMESTAMP_TYPES = ("TIMESTAMP_NTZ", "TIMESTAMP_TZ")
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self.stage = None
+
+    def quote(self, name: str) -> str:
+        # Lowercase names stay unquoted, as with to_sql, so they resolve case-insensitively
+        if re.fullmatch(r"[a-z_][a-z0-9_$]*", name):
+            return name
+        return super().quote(name)
+
+    def prepare_stage(self, database: str, schema: str) -> None:
+        self.stage = f"{self.quote(database)}.{self.quote(schema)}.{self.STAGE_NAME}"
+        self.execute(f"CREATE TEMPORARY STAGE IF NOT EXISTS {self.stage} FILE_FORMAT = (TYPE = PARQUET)")
+
+    def upload(self, local_path: str, stage_prefix: str) -> None:
+        self.execute(f"PUT 'file://{local_path}' @{self.stage}/{stage_prefix} AUTO_COMPRESS = FALSE OVERWRITE = TRUE")
+
+    def copy_into(self, table_name: str, stage_prefix: str) -> int:
+        rows = self.execute(
+            f"COPY INTO {table_name} FROM @{self.stage}/{stage_prefix}/ "
+            "FILE_FORMAT = (TYPE = PARQUET) MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE PURGE = TRUE"
+        )
+
+        # One result row per file: file, status, rows_parsed, rows_loaded, ...
+        return sum(int(row[3]) for row in rows if len(row) > 3)
+
+
+class DuckDBStageLoader(StageLoader):
+    """
+    Loads through a local stage directory into DuckDB, a stand-in for running the bulk path without Snowflake.
+
+    """
+
+    TYPES = [
+        (pa.types.is_boolean, "BOOLEAN"),
+        (pa.types.is_integer, "BIGINT"),
+        (pa.types.is_floating, "DOUBLE"),
+        (pa.types.is_decimal, "DECIMAL(38, 10)"),
+        (pa.types.is_date, "DATE"),
+    ]
+
+    def __init__(self, connection, stage_dir: str):
+        super().__init__(connection)
+        self.stage_dir = stage_dir
+
+    def qualified_name(self, database: str, schema: str, table: str) -> str:
+        # The DuckDB file is the database
+        return f"{self.quote(schema)}.{self.quote(table)}"
+
+    def prepare_stage(self, database: str, schema: str) -> None:
+        self.execute(f"CREATE SCHEMA IF NOT EXISTS {self.quote(schema)}")
+        os.makedirs(self.stage_dir, exist_ok=True)
+
+    def upload(self, local_path: str, stage_prefix: str) -> None:
+        target_dir = os.path.join(self.stage_dir, stage_prefix)
+        os.makedirs(target_dir, exist_ok=True)
+        shutil.copy(local_path, target_dir)
+
+    def copy_into(self, table_name: str, stage_prefix: str) -> int:
+        stage_path = os.path.join(self.stage_dir, stage_prefix)
+        rows = self.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM read_parquet('{stage_path}/*.parquet')")
+
+        shutil.rmtree(stage_path)
+
+        return int(rows[0][0]) if rows else 0
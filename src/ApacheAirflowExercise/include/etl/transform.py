@@ -1,12 +1,17 @@
 import pandas as pd
 
-from include.validations.aggregates_schema import validate_pre_aggregates_schema, validate_post_aggregates_schema
+from include.etl.anomalies import score_anomalies
+from include.etl.daily_rollup import count_unique_customers, monthly_customer_sketches
+from include.etl.forecast import forecast_new_days
+from include.etl.sketches import DEFAULT_RELATIVE_ERROR, estimate_distinct, sketches_from_bytes
+from include.validations.aggregates_schema import validate_post_aggregates_schema
 from include.validations.anomalies_schema import validate_post_anomalies_schema
 from include.validations.customers_schema import validate_post_customers_schema, validate_pre_customers_schema
 from include.validations.forecast_schema import validate_post_forecast_schema
 from include.validations.products_schema import validate_post_products_schema, validate_pre_products_schema
 from include.validations.sales_schema import validate_post_sales_schema, validate_pre_sales_schema
 from include.validations.segmented_schema import validate_post_segmented_schema
+from include.timestamps import parse_timestamps
 
 from ..logger import setup_logger
 
@@ -14,6 +19,12 @@ from ..logger import setup_logger
 logging = setup_logger("etl.transform")
 
 
+DISTINCT_MODES = ["exact", "sketch", "auto"]
+
+SEGMENT_BINS = [0, 1000, 5000, 10000, float("inf")]
+SEGMENT_LABELS = ["Low", "Medium", "High", "VIP"]
+
+
 def clean_sales_data(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     Transforms the sales data by cleaning and formatting.
@@ -25,7 +36,7 @@ def clean_sales_data(sales_df: pd.DataFrame) -> pd.DataFrame:
 
     sales_df.columns = sales_df.columns.str.lower().str.replace(" ", "_")
     sales_df.dropna(inplace=True)
-    sales_df["order_date"] = pd.to_datetime(sales_df["order_date"], format="mixed", errors='coerce')
+    sales_df["order_date"] = parse_timestamps(sales_df["order_date"])
     sales_df["total_revenue"] = sales_df["amount"] * sales_df["quantity"]
 
     sales_df = validate_post_sales_schema(sales_df)
@@ -46,7 +57,7 @@ def clean_customers_data(customers_df: pd.DataFrame) -> pd.DataFrame:
 
     customers_df.columns = customers_df.columns.str.lower().str.replace(" ", "_")
     customers_df.dropna(inplace=True)
-    customers_df["signup_date"] = pd.to_datetime(customers_df["signup_date"], format="mixed", errors='coerce')
+    customers_df["signup_date"] = parse_timestamps(customers_df["signup_date"])
 
     customers_df = validate_post_customers_schema(customers_df)
 
@@ -74,36 +85,43 @@ def clean_products_data(products_df: pd.DataFrame) -> pd.DataFrame:
     return products_df
 
 
-def merge_data(sales_df: pd.DataFrame, customers_df: pd.DataFrame, products_df: pd.DataFrame) -> pd.DataFrame:
+def compute_monthly_aggregates(rollup_df: pd.DataFrame, distinct_mode: str = "exact", relative_error: float = DEFAULT_RELATIVE_ERROR,
+                               auto_threshold: int = 10_000_000) -> pd.DataFrame:
     """
-    Merges sales, customers, and products data into a single DataFrame.
+    Computes monthly aggregates from the daily sales rollup. Unique customers are exact, estimated from
+    mergeable sketches within relative_error, or estimated in "auto" mode once the rollup holds auto_threshold ids.
+    Months with days that only kept a sketch are estimated in exact mode as well.
+
+    The rollup holds every cleaned sale, so sales whose customer or product is missing from the cleaned customers
+    and products count as well, they no longer drop out of an inner join with them.
 
     """
-    logging.info("Merging data")
+    logging.info(f"Computing monthly aggregates with {distinct_mode} unique customers")
 
-    merged_df = sales_df.merge(customers_df, on="customer_id", how="inner").copy()  # Where there is merging, filtering is a good practice to have a copy, which keeps a reference to the original dataframe, but doesn't break it
-    merged_df = merged_df.merge(products_df, on="product_id", how="inner").copy()
-    merged_df["profit_margin"] = merged_df["profit"] / merged_df["total_revenue"]
+    if distinct_mode not in DISTINCT_MODES:
+        raise ValueError(f"Unknown distinct count mode '{distinct_mode}', expected one of {DISTINCT_MODES}")
 
-    logging.info("Data merged successfully")
+    if distinct_mode == "auto":
+        distinct_mode = "sketch" if rollup_df["customer_ids"].dropna().map(len).sum() >= auto_threshold else "exact"
 
-    return merged_df
+    monthly = rollup_df.groupby(pd.Grouper(key="order_date", freq="M"))
+    aggregated_df = monthly.agg(total_sales = ("total_revenue", "sum")).reset_index().copy()
 
+    exact_counts = monthly["customer_ids"].agg(count_unique_customers).astype(float) if distinct_mode == "exact" else None
 
-def compute_monthly_aggregates(merged_df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Computes monthly aggregates from the merged data.
+    if distinct_mode == "sketch" or exact_counts.isna().any():
+        sketch_df = monthly_customer_sketches(rollup_df, relative_error)
+        estimates = pd.Series(estimate_distinct(sketches_from_bytes(sketch_df["customer_sketch"])), index=sketch_df["order_date"])
+        estimates = estimates.reindex(aggregated_df["order_date"]).fillna(0).round()
 
-    """
-    logging.info("Computing monthly aggregates")
-
-    merged_df = validate_pre_aggregates_schema(merged_df)
+    if distinct_mode == "sketch":
+        aggregated_df["unique_customers"] = estimates.astype(int).to_numpy()
+    else:
+        if exact_counts.isna().any():
+            logging.warning(f"{exact_counts.isna().sum()} months have days without customer ids, their unique customers are estimated")
+            exact_counts = exact_counts.where(exact_counts.notna(), estimates.to_numpy())
 
-    merged_df["order_date"] = pd.to_datetime(merged_df["order_date"], format="mixed", errors='coerce')
-    aggregated_df = merged_df.groupby(pd.Grouper(key="order_date", freq="M")).agg(
-        total_sales = ("total_revenue", "sum"),
-        unique_customers = ("customer_id", "nunique")
-    ).reset_index().copy()
+        aggregated_df["unique_customers"] = exact_counts.astype(int).to_numpy()
 
     aggregated_df = validate_post_aggregates_schema(aggregated_df)
 
@@ -112,26 +130,22 @@ def compute_monthly_aggregates(merged_df: pd.DataFrame) -> pd.DataFrame:
     return aggregated_df
 
 
-def segment_customers(sales_df: pd.DataFrame, customers_df: pd.DataFrame) -> pd.DataFrame:
+def segment_customers(spend_df: pd.DataFrame, customers_df: pd.DataFrame) -> pd.DataFrame:
     """
-    Segments customers based on their total spending.
+    Segments customers based on their total spending, from the rows of the customer spend index.
 
     """
-    logging.info("Segmenting customers")
+    logging.info(f"Segmenting {len(spend_df)} customers")
 
-    total_spent_df = sales_df.groupby("customer_id")["total_revenue"].sum().reset_index().copy()
-    total_spent_df.rename(columns={"total_revenue": "total_spent"}, inplace=True)
+    segmented_df = spend_df.merge(customers_df[["customer_id", "signup_date"]], on="customer_id", how="inner")
 
-    segmented_df = customers_df.merge(total_spent_df, on="customer_id", how="left").copy()
-    segmented_df.dropna(subset=["total_spent"], inplace=True)
-
-    segmented_df["customer_segment"] = pd.cut( 
+    segmented_df["customer_segment"] = pd.cut(
         segmented_df["total_spent"],
-        bins=[0, 1000, 5000, 10000, float("inf")],
-        labels=["Low", "Medium", "High", "VIP"]
+        bins=SEGMENT_BINS,
+        labels=SEGMENT_LABELS
     )
 
-    segmented_df["segmentation_date"] = pd.to_datetime(customers_df["signup_date"], format="mixed", errors='coerce')
+    segmented_df["segmentation_date"] = parse_timestamps(segmented_df["signup_date"])
     allowed_columns = ["customer_id", "total_spent", "customer_segment", "segmentation_date"]
     customer_segmenting = segmented_df[allowed_columns].copy()
 
@@ -142,15 +156,16 @@ def segment_customers(sales_df: pd.DataFrame, customers_df: pd.DataFrame) -> pd.
     return customer_segmenting
 
 
-def detect_sales_anomalies(sales_df: pd.DataFrame) -> pd.DataFrame:
+def detect_sales_anomalies(sales_df: pd.DataFrame, stats_df: pd.DataFrame, segment: str | None = None,
+                           sigma: float = 3.0, min_count: int = 30) -> pd.DataFrame:
     """
-    Detects anomalies in sales data based on total revenue.
+    Detects anomalies in sales data based on total revenue, below the mean minus sigma deviations of their segment.
+    The running revenue statistics come from the daily rollup (global) or the segment statistics store.
 
     """
-    logging.info("Detecting sales anomalies")
+    logging.info(f"Detecting sales anomalies by {segment or 'all orders'}")
 
-    threshold = sales_df["total_revenue"].mean() - 3 * sales_df["total_revenue"].std()
-    anomalies_df = sales_df[sales_df["total_revenue"] < threshold].copy()
+    anomalies_df = score_anomalies(sales_df, stats_df, segment, sigma, min_count)
     allowed_columns = ["order_id", "customer_id", "product_id", "order_date", "total_revenue"]
     anomalies_df = anomalies_df[allowed_columns].copy()
 
@@ -161,19 +176,14 @@ def detect_sales_anomalies(sales_df: pd.DataFrame) -> pd.DataFrame:
     return anomalies_df
 
 
-def forecast_sales(sales_df: pd.DataFrame) -> pd.DataFrame:
+def forecast_sales(rollup_df: pd.DataFrame, windows: list = (7,), horizon: int = 1) -> pd.DataFrame:
     """
-    Forecast sales for 7 days mean
+    Forecast daily sales as the means of the last days, sales_forecast holds the first window
 
     """
-    logging.info("Sales forecasting ")
-
-    sales_df["order_date"] = pd.to_datetime(sales_df["order_date"], format="mixed", errors='coerce')
-    sales_df.set_index("order_date", inplace=True)
-    sales_df["sales_forecast"] = sales_df["total_revenue"].rolling(window=7, min_periods=1).mean()
-    sales_df.reset_index(inplace=True)
-    allowed_columns = ["order_date", "total_revenue", "sales_forecast"]
-    sales_df = sales_df[allowed_columns].copy()
+    logging.info(f"Sales forecasting for windows {list(windows)} and horizon {horizon}")
+
+    sales_df, _ = forecast_new_days(rollup_df, list(windows), horizon)
 
     sales_df = validate_post_forecast_schema(sales_df)
 
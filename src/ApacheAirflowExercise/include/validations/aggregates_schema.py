@@ -4,6 +4,7 @@ import pandera.pandas as pa
 from pandera import Column, DataFrameSchema, Check
 from pandera.errors import SchemaErrors
 
+from .fast_validation import validate_fast
 from ..logger import setup_logger
 logging = setup_logger("validations.aggregates_schema")
 
@@ -18,7 +19,7 @@ pre_aggregates_schema = DataFrameSchema(
 post_aggregates_schema = DataFrameSchema(
     {
         "order_date": Column(pa.DateTime),
-        "unique_customers": Column(float, Check.greater_than(0)),
+        "unique_customers": Column(int, Check.greater_than_or_equal_to(0)),
         "total_sales": Column(float, Check.greater_than_or_equal_to(0.0)),
     })
 
@@ -31,7 +32,7 @@ def validate_pre_aggregates_schema(aggregates_df: pd.DataFrame) -> pd.DataFrame:
     logging.info("Validating aggregates data schema")
 
     try:
-        pre_aggregates_schema.validate(aggregates_df)
+        validate_fast(pre_aggregates_schema, aggregates_df)
         logging.info("Aggregates data schema validation passed")
         return aggregates_df
     except SchemaErrors as e:
@@ -45,4 +46,4 @@ def validate_post_aggregates_schema(aggregates_df: pd.DataFrame) -> pd.DataFrame
     """
     logging.info("Validating transformed aggregates data schema")
 
-    return post_aggregates_schema.validate(aggregates_df)
\ No newline at end of file
+    return validate_fast(post_aggregates_schema, aggregates_df)
\ No newline at end of file
@@ -4,6 +4,7 @@ import pandera.pandas as pa
 from pandera import Column, DataFrameSchema, Check
 from pandera.errors import SchemaErrors
 
+from .fast_validation import validate_fast
 from ..logger import setup_logger
 logging = setup_logger("validations.anomalies_schema")
 
@@ -23,4 +24,4 @@ def validate_post_anomalies_schema(anomalies_df: pd.DataFrame) -> pd.DataFrame:
     Validates the transformed anomalies DataFrame against the predefined schema.
     """
     logging.info("Validating transformed anomalies data schema")
-    return anomalies_schema.validate(anomalies_df)
+    return validate_fast(anomalies_schema, anomalies_df)
@@ -4,6 +4,7 @@ import pandera.pandas as pa
 from pandera import Column, DataFrameSchema, Check
 from pandera.errors import SchemaErrors
 
+from .fast_validation import validate_fast
 from ..logger import setup_logger
 logging = setup_logger("validations.customers_schema")
 
@@ -33,7 +34,7 @@ def validate_pre_customers_schema(customers_df: pd.DataFrame) -> pd.DataFrame:
     logging.info("Validating customers data schema")
 
     try:
-        pre_customers_schema.validate(customers_df)
+        validate_fast(pre_customers_schema, customers_df)
         logging.info("Customers data schema validation passed")
         return customers_df
     except SchemaErrors as e:
@@ -48,7 +49,7 @@ def validate_post_customers_schema(customers_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating transformed customers data schema")
 
-    return post_customers_schema.validate(customers_df)
+    return validate_fast(post_customers_schema, customers_df)
 
 
 '''
@@ -0,0 +1,264 @@
+import hashlib
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from pandera.engines import pandas_engine
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("validations.fast_validation")
+
+
+VALIDATION_MODES = ("full", "sample", "skip_unchanged")
+
+# String columns with at most this share of distinct values are validated on their unique values only
+LOW_CARDINALITY_RATIO = 0.5
+CARDINALITY_PROBE_SIZE = 1_000
+
+# Digests of frames that passed validation, shared by the tasks running on the same worker,
+# expired after a day and capped in number
+VALIDATION_CACHE_DIR = os.path.join(tempfile.gettempdir(), "validated_frames")
+VALIDATION_CACHE_TTL = 24 * 3600
+VALIDATION_CACHE_MAX_MARKERS = 10_000
+
+# Built-in pandera checks evaluated as vectorized masks, by check name and from the check's statistics
+CHECK_MASKS = {
+    "greater_than": lambda values, stats: values > stats["min_value"],
+    "greater_than_or_equal_to": lambda values, stats: values >= stats["min_value"],
+    "less_than": lambda values, stats: values < stats["max_value"],
+    "less_than_or_equal_to": lambda values, stats: values <= stats["max_value"],
+    "equal_to": lambda values, stats: values == stats["value"],
+    "not_equal_to": lambda values, stats: values != stats["value"],
+    "in_range": lambda values, stats: (
+        (values >= stats["min_value"] if stats["include_min"] else values > stats["min_value"])
+        & (values <= stats["max_value"] if stats["include_max"] else values < stats["max_value"])
+    ),
+    "isin": lambda values, stats: values.isin(stats["allowed_values"]),
+    "notin": lambda values, stats: ~values.isin(stats["forbidden_values"]),
+}
+
+_settings = {"mode": "full", "sample_size": 10_000}
+_compiled_schemas: dict = {}
+
+
+def set_validation_mode(mode: str, sample_size: int = 10_000) -> None:
+    """
+    Sets how validate_fast validates frames: full, sample or skip_unchanged.
+
+    """
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode '{mode}', expected one of {VALIDATION_MODES}")
+
+    _settings["mode"] = mode
+    _settings["sample_size"] = sample_size
+
+
+def validate_fast(schema, df: pd.DataFrame, mode: str | None = None) -> pd.DataFrame:
+    """
+    Validates a DataFrame against a pandera schema with its compiled vectorized checks, pandera reports the failures.
+
+    """
+    mode = mode or _settings["mode"]
+
+    if mode == "sample" and len(df) > _settings["sample_size"]:
+        return schema.validate(df, sample=_settings["sample_size"], random_state=0)
+
+    if mode == "skip_unchanged":
+        marker_path = os.path.join(VALIDATION_CACHE_DIR, _validation_key(schema, df))
+
+        if os.path.exists(marker_path) and time.time() - os.path.getmtime(marker_path) < VALIDATION_CACHE_TTL:
+            logging.info(f"Skipping validation of unchanged data ({len(df)} rows)")
+            return df
+
+        df = _validate_compiled(schema, df)
+
+        os.makedirs(VALIDATION_CACHE_DIR, exist_ok=True)
+        open(marker_path, "w").close()
+        _expire_markers()
+
+        return df
+
+    return _validate_compiled(schema, df)
+
+
+def dataframe_digest(df: pd.DataFrame) -> str:
+    """
+    Hashes the content, column names and dtypes of a DataFrame.
+
+    """
+    digest = hashlib.sha256()
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in df.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+
+def _validation_key(schema, df: pd.DataFrame) -> str:
+    """
+    Builds the cache key of a schema and frame pair.
+
+    """
+    schema_signature = repr([
+        (name, str(column.dtype), column.nullable, column.unique, [check.name for check in column.checks])
+        for name, column in schema.columns.items()
+    ])
+
+    return hashlib.sha256(f"{schema_signature}:{dataframe_digest(df)}".encode("utf-8")).hexdigest()
+
+
+def _expire_markers() -> None:
+    """
+    Removes the validation markers older than the TTL, then the oldest ones above the maximum number of markers.
+
+    """
+    markers = []
+
+    for entry in os.scandir(VALIDATION_CACHE_DIR):
+        try:
+            markers.append((entry.stat().st_mtime, entry.path))
+        except FileNotFoundError:
+            continue
+
+    markers.sort()
+    expired_before = time.time() - VALIDATION_CACHE_TTL
+    excess = len(markers) - VALIDATION_CACHE_MAX_MARKERS
+
+    for position, (modified_at, path) in enumerate(markers):
+        if modified_at >= expired_before and position >= excess:
+            break
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _validate_compiled(schema, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Runs the compiled checks of every column. Frames failing any of them, or whose schema cannot be compiled,
+    are validated by pandera, so failures raise pandera's own errors with their failure cases.
+
+    """
+    plan = _compile_schema(schema)
+
+    if plan is None or not all(_column_passes(df, *column_plan) for column_plan in plan):
+        return schema.validate(df)
+
+    return df
+
+
+def _compile_schema(schema):
+    """
+    Compiles a schema into one plan per column: its built-in checks as vectorized masks and its remaining checks,
+    or None when the schema needs the whole frame.
+
+    """
+    key = id(schema)
+
+    if key not in _compiled_schemas:
+        needs_frame = (
+            schema.checks or schema.unique or schema.strict or schema.coerce or schema.ordered
+            or schema.index is not None
+            or any(column.regex or column.coerce for column in schema.columns.values())
+        )
+
+        if needs_frame:
+            _compiled_schemas[key] = None
+        else:
+            plan = []
+            for name, column in schema.columns.items():
+                compiled, remaining = [], []
+
+                # Checks that only warn are left to pandera, as are the checks without a mask
+                for check in column.checks:
+                    if check.name in CHECK_MASKS and not check.raise_warning:
+                        compiled.append(check)
+                    else:
+                        remaining.append(check)
+
+                plan.append((name, column, compiled, remaining))
+
+            _compiled_schemas[key] = plan
+
+    return _compiled_schemas[key]
+
+
+def _column_passes(df: pd.DataFrame, name: str, column, compiled: list, remaining: list) -> bool:
+    """
+    Checks one column's presence, dtype, nulls, uniqueness and checks without running pandera.
+
+    """
+    if name not in df.columns:
+        return not column.required
+
+    values = df[name]
+
+    if column.dtype is not None:
+        if not column.dtype.check(pandas_engine.Engine.dtype(values.dtype)):
+            return False
+
+        # Object columns pass the str dtype check whatever they hold, pandera checks the values themselves
+        if str(column.dtype) == "str" and pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+            return False
+
+    missing = values.isna()
+
+    if not column.nullable and missing.any():
+        return False
+
+    if column.unique and values.duplicated().any():
+        return False
+
+    for check in compiled:
+        try:
+            passed = CHECK_MASKS[check.name](values, check.statistics)
+        except TypeError:
+            # Values the check cannot compare, e.g. strings against a number
+            return False
+
+        if check.ignore_na:
+            passed = passed | missing
+
+        if not passed.all():
+            return False
+
+    if remaining:
+        # Custom checks run as they are, on the unique values of low-cardinality string columns
+        reduced = values if column.unique else _reduce_to_unique(values)
+
+        for check in remaining:
+            result = check(reduced.dropna() if check.ignore_na else reduced)
+
+            if not bool(pd.Series(result.check_passed).all()):
+                return False
+
+    return True
+
+
+def _reduce_to_unique(values: pd.Series) -> pd.Series:
+    """
+    Returns the unique values of a low-cardinality string or categorical column, the column itself otherwise.
+
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return pd.Series(values.unique())
+
+    if not pd.api.types.is_object_dtype(values) and not pd.api.types.is_string_dtype(values):
+        return values
+
+    probe = values.iloc[:CARDINALITY_PROBE_SIZE]
+
+    # Object columns holding arrays or other unhashable values are validated as they are
+    if pd.api.types.infer_dtype(probe, skipna=True) != "string":
+        return values
+
+    if probe.nunique(dropna=False) > LOW_CARDINALITY_RATIO * len(probe):
+        return values
+
+    uniques = pd.Series(values.unique(), dtype=values.dtype)
+
+    return uniques if len(uniques) <= LOW_CARDINALITY_RATIO * len(values) else values
@@ -4,6 +4,7 @@ import pandera.pandas as pa
 from pandera import Column, DataFrameSchema, Check
 from pandera.errors import SchemaErrors
 
+from .fast_validation import validate_fast
 from ..logger import setup_logger
 logging = setup_logger("validations.forecast_schema")
 
@@ -13,6 +14,7 @@ forecast_schema = DataFrameSchema(
         "order_date": Column(pa.DateTime),
         "total_revenue": Column(float, Check.greater_than_or_equal_to(0)),
         "sales_forecast": Column(float, Check.greater_than_or_equal_to(0)),
+        "forecast_date": Column(pa.DateTime),
     })
 
 
@@ -23,4 +25,4 @@ def validate_post_forecast_schema(forecast_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating transformed forecast data schema")
 
-    return forecast_schema.validate(forecast_df)
\ No newline at end of file
+    return validate_fast(forecast_schema, forecast_df)
\ No newline at end of file
@@ -4,6 +4,7 @@ import pandera.pandas as pa
 from pandera import Column, DataFrameSchema, Check
 from pandera.errors import SchemaErrors
 
+from .fast_validation import validate_fast
 from ..logger import setup_logger
 logging = setup_logger("validations.products_schema")
 
@@ -33,7 +34,7 @@ def validate_pre_products_schema(products_df: pd.DataFrame) -> pd.DataFrame:
     logging.info("Validating products data schema")
 
     try:
-        pre_products_schema.validate(products_df)
+        validate_fast(pre_products_schema, products_df)
         logging.info("Products data schema validation passed")
         return products_df
     except SchemaErrors as e:
@@ -47,5 +48,5 @@ def validate_post_products_schema(products_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating transformed products data schema")
 
-    return post_products_schema.validate(products_df)
+    return validate_fast(post_products_schema, products_df)
 
@@ -0,0 +1,30 @@
+import pandas as pd
+import pandera.pandas as pa
+
+from pandera import Column, DataFrameSchema, Check
+
+from .fast_validation import validate_fast
+from ..logger import setup_logger
+logging = setup_logger("validations.rollup_schema")
+
+
+daily_rollup_schema = DataFrameSchema(
+    {
+        "order_date": Column(pa.DateTime, unique=True),
+        "total_revenue": Column(float, Check.greater_than_or_equal_to(0.0)),
+        "order_count": Column(int, Check.greater_than(0)),
+        "revenue_mean": Column(float),
+        "revenue_m2": Column(float, Check.greater_than_or_equal_to(0.0)),
+        "customer_ids": Column(object, nullable=True),
+        "customer_sketch": Column(object, nullable=True),
+    })
+
+
+def validate_post_daily_rollup_schema(rollup_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validates the daily sales rollup DataFrame against the predefined schema.
+
+    """
+    logging.info("Validating daily sales rollup schema")
+
+    return validate_fast(daily_rollup_schema, rollup_df)
@@ -4,6 +4,7 @@ import pandera.pandas as pa
 from pandera import Column, DataFrameSchema, Check
 from pandera.errors import SchemaErrors
 
+from .fast_validation import validate_fast
 from ..logger import setup_logger
 logging = setup_logger("validations.sales_schema")
 
@@ -43,7 +44,7 @@ def validate_pre_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
     logging.info("Validating sales data schema")
 
     try:
-        pre_sales_schema.validate(sales_df)
+        validate_fast(pre_sales_schema, sales_df)
         logging.info("Sales data schema validation passed")
         return sales_df
     except SchemaErrors as e:
@@ -57,4 +58,4 @@ def validate_post_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating transformed sales data schema")
 
-    return post_sales_schema.validate(sales_df)
+    return validate_fast(post_sales_schema, sales_df)
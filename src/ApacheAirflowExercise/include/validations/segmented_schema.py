@@ -4,6 +4,7 @@ import pandera.pandas as pa
 from pandera import Column, DataFrameSchema, Check
 from pandera.errors import SchemaErrors
 
+from .fast_validation import validate_fast
 from ..logger import setup_logger
 logging = setup_logger("validations.segmented_schema")
 
@@ -24,4 +25,4 @@ def validate_post_segmented_schema(segmented_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating transformed segmented data schema")
 
-    return segmented_schema.validate(segmented_df)
+    return validate_fast(segmented_schema, segmented_df)
@@ -0,0 +1,250 @@
+import json
+import os
+
+from collections.abc import Sequence
+
+import fsspec
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from airflow.sdk.bases.xcom import BaseXCom
+
+from .dataframe_cache import cache_get, cache_put, clear_cache
+from .logger import setup_logger
+
+
+logging = setup_logger("xcom_backend")
+
+
+# Enabled with AIRFLOW__CORE__XCOM_BACKEND=include.xcom_backend.DataFrameXComBackend
+XCOM_ROOT_ENV = "XCOM_DATAFRAME_ROOT"                  # s3://bucket/prefix or a local directory
+XCOM_FORMAT_ENV = "XCOM_DATAFRAME_FORMAT"              # parquet or arrow
+XCOM_COMPRESSION_ENV = "XCOM_DATAFRAME_COMPRESSION"
+XCOM_AWS_CONN_ID_ENV = "XCOM_DATAFRAME_AWS_CONN_ID"
+XCOM_ENDPOINT_URL_ENV = "XCOM_DATAFRAME_ENDPOINT_URL"  # e.g. a moto server in tests
+
+# Set by Airflow in the environment of a running task
+TRY_NUMBER_ENV = "AIRFLOW_CTX_TRY_NUMBER"
+
+REFERENCE_KEY = "__dataframe_xcom__"
+FORMAT_SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+class DataFrameXComBackend(BaseXCom):
+    """
+    XCom backend storing DataFrames (and dicts and lists of DataFrames) in an object store, only their paths go through XCom.
+
+    """
+
+    @staticmethod
+    def serialize_value(value, *, key=None, task_id=None, dag_id=None, run_id=None, map_index=None, **kwargs):
+        if isinstance(value, pd.DataFrame):
+            base_path = _xcom_path(dag_id, run_id, task_id, map_index, key)
+            value = {REFERENCE_KEY: write_dataframe(value, base_path)}
+
+        elif isinstance(value, dict) and value and all(isinstance(item, pd.DataFrame) for item in value.values()):
+            base_path = _xcom_path(dag_id, run_id, task_id, map_index, key)
+            # Dict keys may be S3 keys, files are named by position and the keys are kept in the reference
+            value = {
+                REFERENCE_KEY: {
+                    name: write_dataframe(df, f"{base_path}/{position}")
+                    for position, (name, df) in enumerate(value.items())
+                }
+            }
+
+        elif isinstance(value, list) and value and all(isinstance(item, pd.DataFrame) for item in value):
+            base_path = _xcom_path(dag_id, run_id, task_id, map_index, key)
+            value = {REFERENCE_KEY: [write_dataframe(df, f"{base_path}/{position}") for position, df in enumerate(value)]}
+
+        return BaseXCom.serialize_value(value, key=key, task_id=task_id, dag_id=dag_id, run_id=run_id, map_index=map_index)
+
+    @staticmethod
+    def deserialize_value(result):
+        value = BaseXCom.deserialize_value(result)
+
+        if not _is_reference(value):
+            return value
+
+        reference = value[REFERENCE_KEY]
+
+        if isinstance(reference, dict):
+            return {name: read_dataframe(path) for name, path in reference.items()}
+
+        if isinstance(reference, list):
+            return LazyDataFrameList(reference)
+
+        return read_dataframe(reference)
+
+    @staticmethod
+    def purge(xcom, *args, **kwargs):
+        value = xcom.value
+
+        if isinstance(value, (str, bytes)):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return
+
+        if not _is_reference(value):
+            return
+
+        reference = value[REFERENCE_KEY]
+        if isinstance(reference, dict):
+            paths = list(reference.values())
+        elif isinstance(reference, list):
+            paths = reference
+        else:
+            paths = [reference]
+
+        for path in paths:
+            fs = _get_filesystem(path)
+            if fs.exists(path):
+                fs.rm(path)
+                logging.info(f"Removed XCom DataFrame {path}")
+
+
+class LazyDataFrameList(Sequence):
+    """
+    List of stored DataFrames read on access, a task mapped over the list only reads its own item.
+
+    """
+
+    def __init__(self, paths: list):
+        self.paths = paths
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [read_dataframe(path) for path in self.paths[index]]
+
+        return read_dataframe(self.paths[index])
+
+
+def write_dataframe(df: pd.DataFrame, base_path: str) -> str:
+    """
+    Writes a DataFrame in the configured format and compression, keeping dtypes and index, and returns its path.
+
+    """
+    data_format = os.environ.get(XCOM_FORMAT_ENV, "parquet")
+    compression = os.environ.get(XCOM_COMPRESSION_ENV, "zstd")
+
+    if data_format not in FORMAT_SUFFIXES:
+        raise ValueError(f"Unknown XCom DataFrame format '{data_format}', expected one of {list(FORMAT_SUFFIXES)}")
+
+    path = f"{base_path}{FORMAT_SUFFIXES[data_format]}"
+    fs = _get_filesystem(path)
+    table = pa.Table.from_pandas(df)
+
+    with fs.open(path, "wb") as file:
+        if data_format == "parquet":
+            pq.write_table(table, file, compression=compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            with pa.ipc.new_file(file, table.schema, options=options) as writer:
+                writer.write_table(table)
+
+    logging.info(f"DataFrame with {len(df)} rows stored as XCom at {path}")
+
+    # Downstream tasks on this worker map the table instead of downloading it
+    cache_put(_cache_key(path), table)
+
+    return path
+
+
+def read_dataframe(path: str) -> pd.DataFrame:
+    """
+    Reads a DataFrame written by write_dataframe, from the worker cache when it holds it.
+
+    """
+    df = cache_get(_cache_key(path))
+
+    if df is not None:
+        return df
+
+    fs = _get_filesystem(path)
+
+    with fs.open(path, "rb") as file:
+        if path.endswith(FORMAT_SUFFIXES["arrow"]):
+            table = pa.ipc.open_file(file).read_all()
+        else:
+            table = pq.read_table(file)
+
+    cache_put(_cache_key(path), table)
+
+    return table.to_pandas()
+
+
+def clear_run_cache(dag_id: str, run_id: str) -> None:
+    """
+    Removes the DataFrames of a DAG run from this worker's cache.
+
+    """
+    clear_cache(_cache_key(_run_path(dag_id, run_id)))
+
+
+def _is_reference(value) -> bool:
+    """
+    Checks whether a deserialized XCom value is a stored DataFrame reference.
+
+    """
+    return isinstance(value, dict) and set(value) == {REFERENCE_KEY}
+
+
+def _xcom_path(dag_id: str, run_id: str, task_id: str, map_index: int | None, key: str) -> str:
+    """
+    Builds the storage path of one XCom value, unique per DAG run, task, map index, try and key.
+
+    """
+    map_index = -1 if map_index is None else map_index
+
+    # A retry writes new paths, so no worker cache can serve the tables of an earlier try
+    try_number = os.environ.get(TRY_NUMBER_ENV, "1")
+
+    return f"{_run_path(dag_id, run_id)}/{task_id}/{map_index}/try_{try_number}/{key}"
+
+
+def _run_path(dag_id: str, run_id: str) -> str:
+    """
+    Builds the storage path holding the XCom values of one DAG run.
+
+    """
+    root = os.environ.get(XCOM_ROOT_ENV)
+
+    if not root:
+        raise ValueError(f"{XCOM_ROOT_ENV} must be set to store DataFrames in XCom")
+
+    return f"{root.rstrip('/')}/{dag_id}/{run_id}"
+
+
+def _cache_key(path: str) -> str:
+    """
+    Turns a storage path into its worker cache key, the path without its protocol.
+
+    """
+    return path.split("://", 1)[-1]
+
+
+def _get_filesystem(path: str) -> fsspec.AbstractFileSystem:
+    """
+    Returns the fsspec filesystem of a path, with the configured AWS connection and endpoint for S3.
+
+    """
+    protocol = fsspec.utils.get_protocol(path)
+
+    if protocol == "file":
+        return fsspec.filesystem("file", auto_mkdir=True)
+
+    storage_options = {}
+
+    if os.environ.get(XCOM_AWS_CONN_ID_ENV):
+        from .s3_utils import get_storage_options
+
+        s3_hook, storage_options = get_storage_options(os.environ[XCOM_AWS_CONN_ID_ENV])
+
+    if os.environ.get(XCOM_ENDPOINT_URL_ENV):
+        storage_options["client_kwargs"] = {"endpoint_url": os.environ[XCOM_ENDPOINT_URL_ENV]}
+
+    return fsspec.filesystem(protocol, **storage_options)
@@ -0,0 +1,105 @@
+"""Stage, COPY INTO and MERGE load path, run offline against DuckDB through DuckDBStageLoader."""
+
+import duckdb
+import pandas as pd
+import pytest
+
+from include.etl.load_data import ROW_HASH_COLUMN, bulk_load_dataframe, merge_load_dataframe
+from include.etl.stage_loaders import DuckDBStageLoader
+
+
+DATABASE, SCHEMA, TABLE = "test_db", "cleansed_layer", "sales"
+
+
+@pytest.fixture
+def loader(tmp_path):
+    connection = duckdb.connect(str(tmp_path / "warehouse.duckdb"))
+    yield DuckDBStageLoader(connection, str(tmp_path / "stage"))
+    connection.close()
+
+
+def loaded_rows(loader: DuckDBStageLoader) -> pd.DataFrame:
+    table_name = loader.qualified_name(DATABASE, SCHEMA, TABLE)
+    rows = loader.execute(f"SELECT order_id, customer_id, total_revenue FROM {table_name} ORDER BY order_id")
+
+    return pd.DataFrame(rows, columns=["order_id", "customer_id", "total_revenue"])
+
+
+def merge(loader: DuckDBStageLoader, df: pd.DataFrame, delete_missing: bool = True) -> dict:
+    return merge_load_dataframe(df, loader, DATABASE, SCHEMA, TABLE, keys=["order_id"], delete_missing=delete_missing,
+                                chunk_size=2, parallelism=2)
+
+
+def test_merge_round_trip_inserts_updates_and_deletes(loader):
+    """
+    test that a first load copies every row and a second one merges only the inserted, updated and deleted rows
+    """
+    first_df = pd.DataFrame({"order_id": [1, 2, 3], "customer_id": [10, 20, 30], "total_revenue": [5.0, 7.5, 9.0]})
+    second_df = pd.DataFrame({"order_id": [1, 3, 4], "customer_id": [10, 30, 40], "total_revenue": [5.0, 12.0, 3.0]})
+
+    assert merge(loader, first_df) == {"inserted": 3, "updated": 0, "deleted": 0}
+    pd.testing.assert_frame_equal(loaded_rows(loader), first_df)
+
+    assert merge(loader, second_df) == {"inserted": 1, "updated": 1, "deleted": 1}
+    pd.testing.assert_frame_equal(loaded_rows(loader), second_df)
+
+    table_name = loader.qualified_name(DATABASE, SCHEMA, TABLE)
+    assert loader.table_columns(loader.qualified_name(DATABASE, SCHEMA, f"{TABLE}_staging")) is None
+    assert ROW_HASH_COLUMN in loader.table_columns(table_name)
+
+
+def test_merge_without_changes_and_without_deletes(loader):
+    """
+    test that an unchanged frame merges nothing and delete_missing=False keeps the rows missing from the frame
+    """
+    df = pd.DataFrame({"order_id": [1, 2], "customer_id": [10, 20], "total_revenue": [5.0, 7.5]})
+
+    merge(loader, df)
+
+    assert merge(loader, df) == {"inserted": 0, "updated": 0, "deleted": 0}
+    assert merge(loader, df.iloc[:1], delete_missing=False) == {"inserted": 0, "updated": 0, "deleted": 0}
+    pd.testing.assert_frame_equal(loaded_rows(loader), df)
+
+
+def test_merge_into_target_loaded_before_merge_mode(loader):
+    """
+    test that a target without row hashes gets the column and a partial frame only rewrites its own rows
+    """
+    table_name = loader.qualified_name(DATABASE, SCHEMA, TABLE)
+    loader.execute(f"CREATE SCHEMA {SCHEMA}")
+    loader.execute(f"CREATE TABLE {table_name} AS SELECT * FROM (VALUES (1, 10, 5.0), (2, 20, 7.5)) "
+                   "AS t(order_id, customer_id, total_revenue)")
+    delta_df = pd.DataFrame({"order_id": [2, 3], "customer_id": [20, 30], "total_revenue": [8.0, 9.0]})
+
+    assert merge(loader, delta_df, delete_missing=False) == {"inserted": 1, "updated": 1, "deleted": 0}
+
+    expected = pd.DataFrame({"order_id": [1, 2, 3], "customer_id": [10, 20, 30], "total_revenue": [5.0, 8.0, 9.0]})
+    pd.testing.assert_frame_equal(loaded_rows(loader), expected, check_dtype=False)
+    assert ROW_HASH_COLUMN in loader.table_columns(table_name)
+
+
+def test_partial_frame_never_replaces_the_target(loader):
+    """
+    test that a partial frame with other columns or duplicated keys raises instead of reloading the whole target
+    """
+    df = pd.DataFrame({"order_id": [1, 2], "customer_id": [10, 20], "total_revenue": [5.0, 7.5]})
+    merge(loader, df)
+
+    with pytest.raises(ValueError):
+        merge(loader, df.assign(region="north"), delete_missing=False)
+
+    with pytest.raises(ValueError):
+        merge(loader, pd.concat([df, df]), delete_missing=False)
+
+    pd.testing.assert_frame_equal(loaded_rows(loader), df)
+
+
+def test_empty_frame_loads_an_empty_table(loader):
+    """
+    test that an empty frame replaces the table without copying from an empty stage
+    """
+    df = pd.DataFrame({"order_id": [1], "customer_id": [10], "total_revenue": [5.0]})
+    merge(loader, df)
+
+    assert bulk_load_dataframe(df.iloc[:0], loader, DATABASE, SCHEMA, TABLE) == 0
+    assert loaded_rows(loader).empty
@@ -0,0 +1,24 @@
+"""Monthly aggregates computed from the daily sales rollup."""
+
+import pandas as pd
+
+from include.etl.daily_rollup import build_daily_rollup
+from include.etl.transform import compute_monthly_aggregates
+
+
+def test_monthly_aggregates_count_every_cleaned_sale():
+    """
+    test that sales of customers and products missing from the cleaned customers and products count in the month
+    """
+    sales_df = pd.DataFrame({
+        "order_id": [1, 2, 3, 4],
+        "customer_id": [10, 20, 999, 10],  # 999 is not a known customer
+        "product_id": [100, 100, 100, 999],  # 999 is not a known product
+        "order_date": pd.to_datetime(["2024-01-05 10:00", "2024-01-05 12:00", "2024-01-20 09:00", "2024-02-01 09:00"]),
+        "total_revenue": [10.0, 20.0, 30.0, 40.0],
+    })
+
+    aggregated_df = compute_monthly_aggregates(build_daily_rollup(sales_df))
+
+    assert aggregated_df["total_sales"].tolist() == [60.0, 40.0]
+    assert aggregated_df["unique_customers"].tolist() == [3, 1]
@@ -0,0 +1,87 @@
+"""DataFrame XCom backend: frames written to the object store and read back from the path passed through XCom."""
+
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from include.xcom_backend import REFERENCE_KEY, DataFrameXComBackend, LazyDataFrameList
+
+
+XCOM_CONTEXT = {"key": "return_value", "task_id": "transform", "dag_id": "sales_etl", "run_id": "manual__1", "map_index": -1}
+
+
+@pytest.fixture(autouse=True)
+def xcom_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("XCOM_DATAFRAME_ROOT", str(tmp_path / "xcom"))
+    monkeypatch.setenv("XCOM_DATAFRAME_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("AIRFLOW_CTX_TRY_NUMBER", "2")
+
+
+def sales_df(offset: int = 0) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "customer_id": pd.Series([10, 20, 30], dtype="int64") + offset,
+            "region": ["north", "south", "east"],
+            "total_revenue": [5.0, 7.5, 9.25],
+            "order_date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+        },
+        index=pd.Index([101, 102, 103], name="order_id"),
+    )
+
+
+def round_trip(value):
+    serialized = DataFrameXComBackend.serialize_value(value, **XCOM_CONTEXT)
+
+    return serialized, DataFrameXComBackend.deserialize_value(SimpleNamespace(value=serialized))
+
+
+@pytest.mark.parametrize("data_format", ["parquet", "arrow"])
+def test_dataframe_round_trip(monkeypatch, data_format):
+    """
+    test that a DataFrame keeps its values, dtypes and index and only its path goes through XCom
+    """
+    monkeypatch.setenv("XCOM_DATAFRAME_FORMAT", data_format)
+    df = sales_df()
+
+    serialized, restored = round_trip(df)
+
+    assert REFERENCE_KEY in str(serialized)
+    assert "/sales_etl/manual__1/transform/-1/try_2/return_value" in str(serialized)
+    pd.testing.assert_frame_equal(restored, df)
+
+    # The second read comes from the local cache and must stay writable
+    cached = DataFrameXComBackend.deserialize_value(SimpleNamespace(value=serialized))
+    cached.loc[101, "total_revenue"] = 0.0
+    pd.testing.assert_frame_equal(DataFrameXComBackend.deserialize_value(SimpleNamespace(value=serialized)), df)
+
+
+def test_dict_and_list_of_dataframes_round_trip():
+    """
+    test that a dict keeps its keys and a list comes back as a lazily read list of the same frames
+    """
+    frames = {"s3://bucket/sales/a.csv": sales_df(), "s3://bucket/sales/b.csv": sales_df(offset=100)}
+
+    _, restored_dict = round_trip(frames)
+
+    assert list(restored_dict) == list(frames)
+    for name, df in frames.items():
+        pd.testing.assert_frame_equal(restored_dict[name], df)
+
+    _, restored_list = round_trip(list(frames.values()))
+
+    assert isinstance(restored_list, LazyDataFrameList)
+    assert len(restored_list) == 2
+    pd.testing.assert_frame_equal(restored_list[1], frames["s3://bucket/sales/b.csv"])
+    pd.testing.assert_frame_equal(restored_list[:1][0], frames["s3://bucket/sales/a.csv"])
+
+
+def test_plain_values_pass_through():
+    """
+    test that values other than DataFrames are left to the default XCom serialization
+    """
+    value = {"inserted": 3, "updated": 0, "deleted": 1}
+
+    _, restored = round_trip(value)
+
+    assert restored == value
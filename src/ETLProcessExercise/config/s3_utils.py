@@ -1,17 +1,33 @@
+import threading
+
 import boto3
-from config.settings import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY
+
+from botocore.config import Config
+from config.settings import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, S3_MAX_POOL_CONNECTIONS
+
+
+# One client per process, its HTTP connection pool is reused by every call
+_client_lock = threading.Lock()
+_s3 = None
+
 
 def get_s3_client_and_storage_options():
+    global _s3
+
+    with _client_lock:
+        if _s3 is None:
+            _s3 = boto3.client(
+                's3',
+                aws_access_key_id=AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS),
+            )
 
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    )
-    
+    # Same options on every call, so fsspec reuses one filesystem instance
     storage_options = {
-        'key': s3._request_signer._credentials.access_key,
-        'secret': s3._request_signer._credentials.secret_key,
+        'key': _s3._request_signer._credentials.access_key,
+        'secret': _s3._request_signer._credentials.secret_key,
+        'config_kwargs': {'max_pool_connections': S3_MAX_POOL_CONNECTIONS},
     }
 
-    return s3, storage_options
\ No newline at end of file
+    return _s3, storage_options
@@ -1,5 +1,6 @@
 AWS_ACCESS_KEY_ID = ''
 AWS_SECRET_ACCESS_KEY = ''
+S3_MAX_POOL_CONNECTIONS = 32
 
 BUCKET_NAME = 'iva-data-warehouse-10'
 FOLDER_NAME = 'ETLAndELT/'
@@ -1,3 +1,5 @@
+import io
+
 import pandas as pd
 import psycopg2
 from sqlalchemy import create_engine
@@ -5,6 +7,10 @@ from sqlalchemy import create_engine
 from config.settings import USER, PASSWORD, HOST, PORT, DATABASE
 
 
+TRANSFORMED_COLUMNS = ["order_id", "customer_id", "total_revenue", "profit_margin", "shipping_days"]
+INTEGER_COLUMNS = ["order_id", "customer_id", "shipping_days"]
+
+
 def load_raw_to_postgres(df: pd.DataFrame, table_name: str, if_exists: str = "append") -> None:
    
     try:
@@ -18,8 +24,8 @@ def load_raw_to_postgres(df: pd.DataFrame, table_name: str, if_exists: str = "ap
         raise
 
 
-def load_transformed_to_postgres(df: pd.DataFrame, table_name: str) -> None:
-    
+def load_transformed_to_postgres(df: pd.DataFrame, table_name: str, batch_size: int = 100_000) -> None:
+    # Rows are streamed into a temporary staging table with COPY in batches, then upserted with one statement
     create_table_sql = f"""
     CREATE TABLE IF NOT EXISTS {table_name} (
         order_id INT PRIMARY KEY,
@@ -29,9 +35,14 @@ def load_transformed_to_postgres(df: pd.DataFrame, table_name: str) -> None:
         shipping_days INT
     );
     """
-    insert_sql = f"""
-    INSERT INTO {table_name} (order_id, customer_id, total_revenue, profit_margin, shipping_days)
-    VALUES (%s, %s, %s, %s, %s)
+    # Temporary tables live in their own schema, so the staging name drops the target's schema
+    relation_name = table_name.rsplit(".", 1)[-1].strip('"')
+    staging_table = f"{relation_name}_staging"
+    create_staging_sql = f"CREATE TEMP TABLE {staging_table} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP;"
+    copy_sql = f"COPY {staging_table} ({', '.join(TRANSFORMED_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    upsert_sql = f"""
+    INSERT INTO {table_name} ({', '.join(TRANSFORMED_COLUMNS)})
+    SELECT {', '.join(TRANSFORMED_COLUMNS)} FROM {staging_table}
     ON CONFLICT (order_id) DO UPDATE SET
         customer_id = EXCLUDED.customer_id,
         total_revenue = EXCLUDED.total_revenue,
@@ -41,24 +52,40 @@ def load_transformed_to_postgres(df: pd.DataFrame, table_name: str) -> None:
 
     db_params = {"host": HOST, "port": PORT, "database": DATABASE, "user": USER, "password": PASSWORD}
 
+    staged_df = prepare_transformed_rows(df)
+
     try:
         with psycopg2.connect(**db_params) as conn:
             with conn.cursor() as cursor:
                 cursor.execute(create_table_sql)
-                values= [
-                    (
-                        row['order_id'],
-                        row['customer_id'],
-                        row['total_revenue'],
-                        row['profit_margin'],
-                        row['shipping_days']
-                    )
-                    for _, row in df.iterrows()
-                    ]
-                cursor.executemany(insert_sql, values)
+                cursor.execute(create_staging_sql)
+
+                for start in range(0, len(staged_df), batch_size):
+                    buffer = io.StringIO()
+                    staged_df.iloc[start:start + batch_size].to_csv(buffer, index=False, header=False)
+                    buffer.seek(0)
+                    cursor.copy_expert(copy_sql, buffer)
+
+                cursor.execute(upsert_sql)
                 conn.commit()
-                print(f"Transformed data loaded successfully into table '{table_name}'.")
+                print(f"Transformed data loaded successfully into table '{table_name}': {len(staged_df)} rows upserted.")
     except Exception as e:
         print(f"Error loading transformed data into PostgreSQL table '{table_name}': {e}")
         raise
 
+
+def prepare_transformed_rows(df: pd.DataFrame) -> pd.DataFrame:
+    # One row per order_id, the last one winning as with row-by-row upserts
+    staged_df = df[TRANSFORMED_COLUMNS].drop_duplicates(subset="order_id", keep="last").copy()
+
+    # COPY only reads whole numbers into INT columns, fractional values are rejected rather than rounded
+    for column in INTEGER_COLUMNS:
+        values = pd.to_numeric(staged_df[column])
+        fractional = values.notna() & (values % 1 != 0)
+
+        if fractional.any():
+            raise ValueError(f"{fractional.sum()} non-integral values in integer column '{column}', e.g. {values[fractional].iloc[0]}")
+
+        staged_df[column] = values.astype("Int64")
+
+    return staged_df
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from transform.timestamps import parse_timestamps
+
 
 def clean_data(dfs: list[pd.DataFrame], old_column_name:str | None = None, 
                new_column_name: str | None = None) -> list[pd.DataFrame]:
@@ -21,7 +23,7 @@ def clean_data(dfs: list[pd.DataFrame], old_column_name:str | None = None,
 
         for col in possible_data_columns:
             if col in df.columns:
-                df[col] = pd.to_datetime(df[col], format = '%d-%m-%y', errors='coerce')
+                df[col] = parse_timestamps(df[col], format='%d-%m-%y')
                 print(f"Converted column {col} to datetime in DataFrame at index {i}.")
 
         cleaned_dfs.append(df)
@@ -5,15 +5,23 @@ from airflow.sdk import dag, task, task_group
 from airflow.utils import yaml
 from pendulum import datetime
 
+from include.artifact_store import publish_artifact
+from include.etl.aggregate_store import fold_partial_aggregates, source_fingerprint
+from include.etl.chunked_transform import transform_sales_data_chunked
 from include.etl.extract_data import extract_data_from_s3
-from include.etl.load_data import load_df_to_s3_csv
-from include.etl.transform import enrich_merged_data, hourly_sales_trend, merge_sales_and_products, product_sales_ranking_with_brand, product_sales_ranking_with_brand, revenue_concentration, seasonal_sales_pattern, transform_products_data, transform_sales_data
+from include.etl.load_data import load_df_to_artifact_store, load_df_to_s3_parquet
+from include.etl.transform import FUSED_ANALYTICS_COLUMNS, HOURLY_SALES_TREND_COLUMNS, PRODUCT_SALES_RANKING_COLUMNS, REVENUE_CONCENTRATION_COLUMNS, SEASONAL_SALES_PATTERN_COLUMNS, compute_sales_partials, enrich_merged_data, fused_sales_analytics, hourly_sales_trend, merge_sales_and_products, product_sales_ranking_with_brand, revenue_concentration, sales_analytics_from_partials, seasonal_sales_pattern, transform_products_data, transform_sales_data
+from include.metrics import configure_metrics
 from include.s3_utils import get_storage_options
+from include.validations.fast_validation import set_validation_mode
 
 
 with open("include/config.yaml", "r") as file:
     config = yaml.safe_load(file)
 
+set_validation_mode(config["validation"]["mode"], config["validation"]["sample_size"])
+configure_metrics(**config["metrics"])
+
 
 @dag(
     start_date=datetime(2025, 1, 1),
@@ -74,11 +82,18 @@ def retail_etl_dag():
         
         @task()
         def transform_sales(sales_path: str) -> pd.DataFrame:
+            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['output_folder']}/cleaned_sales.parquet"
+
+            if config["transform"]["sales_chunksize"]:
+                transform_sales_data_chunked(
+                    sales_path, output_path, storage_options,
+                    chunksize=config["transform"]["sales_chunksize"], compression=config["intermediate"]["compression"])
+                return output_path
+
             sales_df = pd.read_csv(sales_path, storage_options=storage_options)
             sales_df = transform_sales_data(sales_df)
 
-            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['output_folder']}/cleaned_sales.csv"
-            load_df_to_s3_csv(sales_df, output_path, config["aws_conn_id"])
+            load_df_to_s3_parquet(sales_df, output_path, config["aws_conn_id"], config["intermediate"]["compression"])
             
             return output_path
         
@@ -87,31 +102,31 @@ def retail_etl_dag():
             products_df = pd.read_json(products_path, storage_options=storage_options)
             products_df = transform_products_data(products_df)
 
-            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['output_folder']}/cleaned_products.csv"
-            load_df_to_s3_csv(products_df, output_path, config["aws_conn_id"])
+            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['output_folder']}/cleaned_products.parquet"
+            load_df_to_s3_parquet(products_df, output_path, config["aws_conn_id"], config["intermediate"]["compression"])
             
             return output_path
 
         @task()
         def merge_data(sales_path: str, products_path: str) -> None:
-            sales_df = pd.read_csv(sales_path, storage_options=storage_options)
-            products_df = pd.read_csv(products_path, storage_options=storage_options)
+            sales_df = pd.read_parquet(sales_path, storage_options=storage_options)
+            products_df = pd.read_parquet(products_path, storage_options=storage_options)
 
             merged_df = merge_sales_and_products(sales_df, products_df)
 
-            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['output_folder']}/merged_data.csv"
-            load_df_to_s3_csv(merged_df, output_path, config["aws_conn_id"])
+            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['output_folder']}/merged_data.parquet"
+            load_df_to_s3_parquet(merged_df, output_path, config["aws_conn_id"], config["intermediate"]["compression"])
             
             return output_path
         
         @task()
         def enrich_data(merged_path: str) -> None:
-            merged_df = pd.read_csv(merged_path, storage_options=storage_options)
+            merged_df = pd.read_parquet(merged_path, storage_options=storage_options)
           
             enriched_df = enrich_merged_data(merged_df)
 
-            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['output_folder']}/enriched_data.csv"
-            load_df_to_s3_csv(enriched_df, output_path, config["aws_conn_id"])
+            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['output_folder']}/enriched_data.parquet"
+            load_df_to_s3_parquet(enriched_df, output_path, config["aws_conn_id"], config["intermediate"]["compression"])
             
             return output_path
 
@@ -129,44 +144,68 @@ def retail_etl_dag():
 
 
     @task_group(group_id="analytics_group")
-    def analytics_group(enriched_path: str):
+    def analytics_group(enriched_path: str, sales_path: str):
+        artifacts_root = f"s3://{config['s3']['bucket']}/{config['s3']['artifacts_folder']}"
+        aggregates_root = f"s3://{config['s3']['bucket']}/{config['s3']['aggregates_folder']}"
 
         @task()
         def run_hourly_sales_trend(enriched_path: str) -> None:
-            enriched_df = pd.read_csv(enriched_path, storage_options=storage_options)
+            enriched_df = pd.read_parquet(enriched_path, columns=HOURLY_SALES_TREND_COLUMNS, storage_options=storage_options)
             result = hourly_sales_trend(enriched_df)
 
-            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['analytics_folder']}/hourly_sales_trend.csv"
-            load_df_to_s3_csv(result, output_path, config["aws_conn_id"])
-            return output_path
+            return load_df_to_artifact_store(result, artifacts_root, config["aws_conn_id"])
         
         @task()
         def run_product_sales_ranking(enriched_path: str) -> None:
-            enriched_df = pd.read_csv(enriched_path, storage_options=storage_options)
+            enriched_df = pd.read_parquet(enriched_path, columns=PRODUCT_SALES_RANKING_COLUMNS, storage_options=storage_options)
             result = product_sales_ranking_with_brand(enriched_df)
 
-            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['analytics_folder']}/product_sales_ranking.csv"
-            load_df_to_s3_csv(result, output_path, config["aws_conn_id"])
-            return output_path
+            return load_df_to_artifact_store(result, artifacts_root, config["aws_conn_id"])
         
         @task()
         def run_seasonal_sales_pattern(enriched_path: str) -> None:
-            enriched_df = pd.read_csv(enriched_path, storage_options=storage_options)
+            enriched_df = pd.read_parquet(enriched_path, columns=SEASONAL_SALES_PATTERN_COLUMNS, storage_options=storage_options)
             result = seasonal_sales_pattern(enriched_df)
 
-            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['analytics_folder']}/seasonal_sales_pattern.csv"
-            load_df_to_s3_csv(result, output_path, config["aws_conn_id"])
-            return output_path
+            return load_df_to_artifact_store(result, artifacts_root, config["aws_conn_id"])
         
         @task()
         def run_revenue_concentration(enriched_path: str) -> None:
-            enriched_df = pd.read_csv(enriched_path, storage_options=storage_options)
+            enriched_df = pd.read_parquet(enriched_path, columns=REVENUE_CONCENTRATION_COLUMNS, storage_options=storage_options)
             result = revenue_concentration(enriched_df)
 
-            output_path = f"s3://{config['s3']['bucket']}/{config['s3']['analytics_folder']}/revenue_concentration.csv"
-            load_df_to_s3_csv(result, output_path, config["aws_conn_id"])
-            return output_path
+            return load_df_to_artifact_store(result, artifacts_root, config["aws_conn_id"])
         
+        @task(multiple_outputs=True)
+        def run_fused_analytics(enriched_path: str) -> dict:
+            enriched_df = pd.read_parquet(enriched_path, columns=FUSED_ANALYTICS_COLUMNS, storage_options=storage_options)
+            results = fused_sales_analytics(enriched_df)
+
+            return {
+                name: load_df_to_artifact_store(result, artifacts_root, config["aws_conn_id"])
+                for name, result in results.items()
+            }
+
+        @task(multiple_outputs=True)
+        def run_incremental_analytics(enriched_path: str, sales_path: str) -> dict:
+            enriched_df = pd.read_parquet(enriched_path, columns=FUSED_ANALYTICS_COLUMNS, storage_options=storage_options)
+            partials = compute_sales_partials(enriched_df)
+
+            source_id = source_fingerprint(sales_path, storage_options)
+            aggregates = fold_partial_aggregates(partials, aggregates_root, source_id, storage_options)
+            results = sales_analytics_from_partials(aggregates)
+
+            return {
+                name: load_df_to_artifact_store(result, artifacts_root, config["aws_conn_id"])
+                for name, result in results.items()
+            }
+
+        if config["analytics"]["mode"] == "fused":
+            return run_fused_analytics(enriched_path)
+
+        if config["analytics"]["mode"] == "incremental":
+            return run_incremental_analytics(enriched_path, sales_path)
+
         hourly_trend = run_hourly_sales_trend(enriched_path)
         product_ranking = run_product_sales_ranking(enriched_path)
         seasonal_pattern = run_seasonal_sales_pattern(enriched_path)
@@ -184,20 +223,17 @@ def retail_etl_dag():
     def load_analytics_group(hourly_trend, product_ranking, seasonal_pattern, revenue_conc):
         
         @task()
-        def copy_csv(input_path: str, output_file: str) -> None:
-            df = pd.read_csv(input_path, storage_options=storage_options)
-
+        def publish_csv(artifact_path: str, output_file: str) -> str:
             bucket = config["s3"]["bucket"]
             folder = config["s3"]["analytics_folder"]
             
             output_path = f"s3://{bucket}/{folder}/{output_file}"
-            load_df_to_s3_csv(df, output_path, config["aws_conn_id"])
-            return output_path
+            return publish_artifact(artifact_path, output_path, storage_options)
         
-        copy_csv.override(task_id="load_hourly_trend")(hourly_trend, "hourly_sales_trend.csv")
-        copy_csv.override(task_id="load_product_ranking")(product_ranking, "product_sales_ranking.csv")
-        copy_csv.override(task_id="load_seasonal_pattern")(seasonal_pattern, "seasonal_sales_pattern.csv")
-        copy_csv.override(task_id="load_revenue_concentration")(revenue_conc, "revenue_concentration.csv")
+        publish_csv.override(task_id="load_hourly_trend")(hourly_trend, "hourly_sales_trend.csv")
+        publish_csv.override(task_id="load_product_ranking")(product_ranking, "product_sales_ranking.csv")
+        publish_csv.override(task_id="load_seasonal_pattern")(seasonal_pattern, "seasonal_sales_pattern.csv")
+        publish_csv.override(task_id="load_revenue_concentration")(revenue_conc, "revenue_concentration.csv")
 
          
     extract_output = extract_group()
@@ -209,7 +245,7 @@ def retail_etl_dag():
     
     enriched_path = transform_output["enriched_data"]
     
-    analytics_output = analytics_group(enriched_path)
+    analytics_output = analytics_group(enriched_path, sales_path)
     
     load_analytics_group(
         hourly_trend=analytics_output["hourly_trend"],
@@ -0,0 +1,95 @@
+import hashlib
+
+import fsspec
+import pandas as pd
+
+from .logger import setup_logger
+from .metrics import record_io
+
+
+logging = setup_logger("artifact_store")
+
+
+def get_filesystem(path: str, storage_options: dict | None = None) -> fsspec.AbstractFileSystem:
+    """
+    Returns the fsspec filesystem for an S3 or local path.
+
+    """
+    protocol = fsspec.utils.get_protocol(path)
+
+    if protocol == "file":
+        return fsspec.filesystem("file", auto_mkdir=True)
+
+    return fsspec.filesystem(protocol, **(storage_options or {}))
+
+
+def store_artifact(data: bytes, store_root: str, suffix: str = "", storage_options: dict | None = None) -> str:
+    """
+    Stores bytes under their SHA-256 digest and skips the upload when identical bytes are already stored.
+
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    artifact_path = f"{store_root.rstrip('/')}/{digest[:2]}/{digest}{suffix}"
+
+    fs = get_filesystem(artifact_path, storage_options)
+
+    if fs.exists(artifact_path):
+        logging.info(f"Artifact {artifact_path} already stored, skipping upload")
+        return artifact_path
+
+    fs.pipe_file(artifact_path, data)
+    record_io(bytes_written=len(data))
+    logging.info(f"Artifact stored at {artifact_path} ({len(data)} bytes)")
+
+    return artifact_path
+
+
+def store_df_artifact(df: pd.DataFrame, store_root: str, storage_options: dict | None = None) -> str:
+    """
+    Stores a DataFrame as a content-addressed CSV artifact.
+
+    """
+    data = df.to_csv(index=False).encode("utf-8")
+
+    return store_artifact(data, store_root, suffix=".csv", storage_options=storage_options)
+
+
+def publish_artifact(artifact_path: str, output_path: str, storage_options: dict | None = None) -> str:
+    """
+    Publishes a stored artifact to its output path with a server-side copy.
+
+    """
+    if fsspec.utils.get_protocol(artifact_path) != fsspec.utils.get_protocol(output_path):
+        raise ValueError(f"Cannot publish {artifact_path} to {output_path} across filesystems")
+
+    fs = get_filesystem(output_path, storage_options)
+
+    if fs.exists(output_path) and _same_content(fs, artifact_path, output_path):
+        logging.info(f"{output_path} already matches {artifact_path}, skipping publish")
+        return output_path
+
+    # On S3 this is a CopyObject request, the bytes never leave the bucket
+    fs.copy(artifact_path, output_path)
+    logging.info(f"Artifact {artifact_path} published to {output_path}")
+
+    return output_path
+
+
+def _same_content(fs: fsspec.AbstractFileSystem, first_path: str, second_path: str) -> bool:
+    """
+    Checks whether two objects hold the same bytes, using ETags when the store provides them.
+
+    """
+    first_info = fs.info(first_path)
+    second_info = fs.info(second_path)
+
+    if first_info.get("size") != second_info.get("size"):
+        return False
+
+    first_etag = first_info.get("ETag")
+    second_etag = second_info.get("ETag")
+
+    if first_etag and second_etag:
+        return first_etag == second_etag
+
+    return fs.cat_file(first_path) == fs.cat_file(second_path)
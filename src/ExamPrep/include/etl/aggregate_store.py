@@ -0,0 +1,110 @@
+import json
+
+import pandas as pd
+
+from include.artifact_store import get_filesystem
+from include.etl.transform import SALES_PARTIAL_KEYS
+from include.metrics import instrument_stage, record_io
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("etl.aggregate_store")
+
+
+MANIFEST_FILE = "_manifest.json"
+
+
+def source_fingerprint(path: str, storage_options: dict | None = None) -> str:
+    """
+    Identifies a source file by its path and content version (ETag, or size and modification time).
+
+    """
+    info = get_filesystem(path, storage_options).info(path)
+    version = info.get("ETag") or f"{info.get('size')}-{info.get('mtime') or info.get('LastModified')}"
+
+    return f"{path}#{version}"
+
+
+def read_partial_aggregates(store_root: str, storage_options: dict | None = None) -> dict:
+    """
+    Reads the current partial aggregates from the store, empty when nothing was folded yet.
+
+    """
+    fs = get_filesystem(store_root, storage_options)
+    manifest = _read_manifest(fs, store_root)
+
+    if manifest["version"] == 0:
+        return {}
+
+    partials = {}
+    for name in SALES_PARTIAL_KEYS:
+        partial_path = _partial_path(store_root, manifest["version"], name)
+
+        with fs.open(partial_path, "rb") as file:
+            partials[name] = pd.read_parquet(file)
+
+        record_io(bytes_read=fs.size(partial_path))
+
+    return partials
+
+
+@instrument_stage()
+def fold_partial_aggregates(partials: dict, store_root: str, source_id: str, storage_options: dict | None = None) -> dict:
+    """
+    Folds the partial aggregates of one source into the store, once per source, and returns the merged aggregates.
+
+    """
+    fs = get_filesystem(store_root, storage_options)
+    manifest = _read_manifest(fs, store_root)
+
+    if source_id in manifest["sources"]:
+        logging.info(f"Source {source_id} was already folded into {store_root}, skipping")
+        return read_partial_aggregates(store_root, storage_options)
+
+    stored = read_partial_aggregates(store_root, storage_options)
+    version = manifest["version"] + 1
+
+    merged = {}
+    for name, keys in SALES_PARTIAL_KEYS.items():
+        combined = pd.concat([stored[name], partials[name]], ignore_index=True) if name in stored else partials[name]
+        merged[name] = combined.groupby(by=keys, as_index=False, observed=True).sum()
+
+        with fs.open(_partial_path(store_root, version, name), "wb") as file:
+            merged[name].to_parquet(file, index=False)
+            record_io(bytes_written=file.tell())
+
+    # The manifest is written last, a failed fold leaves the previous version in place
+    previous_version = manifest["version"]
+    manifest = {"version": version, "sources": manifest["sources"] + [source_id]}
+    manifest_data = json.dumps(manifest).encode("utf-8")
+    fs.pipe_file(f"{store_root.rstrip('/')}/{MANIFEST_FILE}", manifest_data)
+    record_io(bytes_written=len(manifest_data))
+
+    if previous_version:
+        fs.rm(f"{store_root.rstrip('/')}/v{previous_version}", recursive=True)
+
+    logging.info(f"Source {source_id} folded into {store_root} (version {version})")
+
+    return merged
+
+
+def _read_manifest(fs, store_root: str) -> dict:
+    """
+    Reads the store manifest with the current version and the folded sources.
+
+    """
+    manifest_path = f"{store_root.rstrip('/')}/{MANIFEST_FILE}"
+
+    if not fs.exists(manifest_path):
+        return {"version": 0, "sources": []}
+
+    return json.loads(fs.cat_file(manifest_path))
+
+
+def _partial_path(store_root: str, version: int, name: str) -> str:
+    """
+    Returns the path of one partial aggregate within a store version.
+
+    """
+    return f"{store_root.rstrip('/')}/v{version}/{name}.parquet"
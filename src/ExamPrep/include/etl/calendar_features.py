@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("etl.calendar_features")
+
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Longest time range (in hours) covered by a contiguous dimension, wider ranges use only the observed hours
+MAX_DIMENSION_HOURS = 24 * 366 * 20
+
+
+def build_calendar_dimension(hours: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    Builds the date/hour dimension with month, week, weekday and hour for the given hours.
+
+    """
+    return pd.DataFrame(
+        {
+            "month": pd.Categorical(hours.to_period("M").astype(str)),
+            "week": hours.isocalendar().week.array,
+            "weekday": pd.Categorical(hours.day_name(), categories=WEEKDAY_NAMES),
+            "hour": hours.hour.to_numpy(dtype=np.int64),
+        }
+    )
+
+
+def add_calendar_features(df: pd.DataFrame, timestamp_column: str = "timestamp") -> pd.DataFrame:
+    """
+    Adds month, week, weekday and hour columns by looking them up in a calendar dimension built once.
+
+    """
+    hours = df[timestamp_column].dt.floor("h")
+    start = hours.min()
+
+    if pd.isna(start):
+        positions = np.full(len(df), -1, dtype=np.int64)
+        dimension_hours = pd.DatetimeIndex([])
+    elif (hours.max() - start) / pd.Timedelta(hours=1) <= MAX_DIMENSION_HOURS:
+        positions = ((hours - start) // pd.Timedelta(hours=1)).fillna(-1).to_numpy(dtype=np.int64)
+        dimension_hours = pd.date_range(start, hours.max(), freq="h")
+    else:
+        positions, dimension_hours = pd.factorize(hours)
+        dimension_hours = pd.DatetimeIndex(dimension_hours)
+
+    dimension = build_calendar_dimension(dimension_hours)
+    found = positions >= 0
+
+    logging.info(f"Calendar dimension built with {len(dimension)} hours for {len(df)} rows")
+
+    df["month"] = _take_categorical(dimension["month"], positions, found)
+    df["week"] = dimension["week"].array.take(positions, allow_fill=True)
+    df["weekday"] = _take_categorical(dimension["weekday"], positions, found)
+
+    if found.all():
+        df["hour"] = dimension["hour"].to_numpy()[positions]
+    else:
+        hour_values = np.full(len(df), np.nan)
+        hour_values[found] = dimension["hour"].to_numpy()[positions[found]]
+        df["hour"] = hour_values
+
+    return df
+
+
+def _take_categorical(values: pd.Series, positions: np.ndarray, found: np.ndarray) -> pd.Categorical:
+    """
+    Takes categorical dimension values by position through their codes, missing positions become NaN.
+
+    """
+    codes = np.full(len(positions), -1, dtype=values.cat.codes.dtype)
+    codes[found] = values.cat.codes.to_numpy()[positions[found]]
+
+    return pd.Categorical.from_codes(codes, dtype=values.dtype)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from include.artifact_store import get_filesystem
+from include.etl.transform import transform_sales_data
+from include.metrics import instrument_stage, record_io
+from include.validations.sales_schema import sales_input_schema
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("etl.chunked_transform")
+
+
+# Column parsed to datetime by the transform, read as a string like the other str columns
+SALES_TIMESTAMP_COLUMN = "timestamp"
+
+
+def sales_read_dtypes() -> dict:
+    """
+    Returns the dtype of every sales input column, so each chunk reads with the same dtypes whatever its values.
+    Integers read as nullable Int64, a chunk with a missing id or quantity still reads.
+
+    """
+    dtypes = {}
+    for name, column in sales_input_schema.columns.items():
+        dtype = str(column.dtype)
+        dtypes[name] = "object" if dtype == "str" else "Int64" if dtype == "int64" else dtype
+
+    return dtypes
+
+
+def sales_parquet_schema() -> pa.Schema:
+    """
+    Returns the Parquet schema of the cleaned sales, derived from the input schema rather than from a chunk.
+
+    """
+    fields = []
+    for name, column in sales_input_schema.columns.items():
+        dtype = str(column.dtype)
+
+        if name == SALES_TIMESTAMP_COLUMN:
+            fields.append(pa.field(name, pa.timestamp("ns")))
+        elif dtype == "str":
+            fields.append(pa.field(name, pa.string()))
+        else:
+            fields.append(pa.field(name, pa.from_numpy_dtype(np.dtype(dtype))))
+
+    return pa.schema(fields)
+
+
+@instrument_stage()
+def transform_sales_data_chunked(input_path: str, output_path: str, storage_options: dict | None = None,
+                                 chunksize: int = 100_000, compression: str = "snappy") -> int:
+    """
+    Cleans the sales CSV chunk by chunk and streams every cleaned chunk into one Parquet file.
+
+    """
+    logging.info(f"Cleaning sales data from {input_path} in chunks of {chunksize} rows")
+
+    fs = get_filesystem(output_path, storage_options)
+    record_io(bytes_read=get_filesystem(input_path, storage_options).size(input_path))
+    schema = sales_parquet_schema()
+    total_rows = 0
+
+    try:
+        with fs.open(output_path, "wb") as output_file:
+            chunks = pd.read_csv(input_path, chunksize=chunksize, dtype=sales_read_dtypes(), storage_options=storage_options)
+
+            with pq.ParquetWriter(output_file, schema, compression=compression) as writer:
+                for chunk in chunks:
+                    cleaned_df = transform_sales_data(_as_inferred_dtypes(chunk))
+                    writer.write_table(pa.Table.from_pandas(cleaned_df, schema=schema, preserve_index=False))
+                    total_rows += len(cleaned_df)
+
+            record_io(bytes_written=output_file.tell())
+    except Exception as e:
+        logging.error(f"Failed to clean sales data from {input_path} into {output_path}: {e}")
+        raise
+
+    logging.info(f"Sales data cleaned successfully, {total_rows} rows written to {output_path}")
+
+    return total_rows
+
+
+def _as_inferred_dtypes(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Gives the nullable integer columns the dtype read_csv infers in memory: int64, or float64 with missing values.
+
+    """
+    integer_columns = chunk.select_dtypes("Int64").columns
+
+    return chunk.astype({column: "float64" if chunk[column].isna().any() else "int64" for column in integer_columns})
@@ -1,6 +1,8 @@
 import pandas as pd
 
-from include.s3_utils import get_storage_options
+from include.artifact_store import store_df_artifact
+from include.s3_utils import get_s3_filesystem, get_storage_options
+from include.metrics import instrument_stage, record_io
 
 from ..logger import setup_logger
 
@@ -8,18 +10,51 @@ from ..logger import setup_logger
 logging = setup_logger("etl.load_data")
 
 
+@instrument_stage()
 def load_df_to_s3_csv(df: pd.DataFrame, s3_path: str, aws_conn_id: str) -> None:
     """
     Loads a DataFrame to an S3 path in CSV format.
 
     """
-    s3_hook, storage_options = get_storage_options(aws_conn_id)
+    try:
+        data = df.to_csv(index=False).encode("utf-8")
+        get_s3_filesystem(aws_conn_id).pipe_file(s3_path, data)
+        record_io(bytes_written=len(data))
+        logging.info(f"DataFrame successfully loaded to {s3_path}")
+    except Exception as e:
+        logging.error(f"Failed to load DataFrame to {s3_path}: {e}")
+        raise
+
 
+@instrument_stage()
+def load_df_to_s3_parquet(df: pd.DataFrame, s3_path: str, aws_conn_id: str, compression: str = "snappy") -> None:
+    """
+    Loads a DataFrame to an S3 path in Parquet format, keeping column dtypes.
+
+    """
     try:
-        df.to_csv(s3_path, index=False, storage_options=storage_options)
+        with get_s3_filesystem(aws_conn_id).open(s3_path, "wb") as file:
+            df.to_parquet(file, index=False, engine="pyarrow", compression=compression)
+            record_io(bytes_written=file.tell())
         logging.info(f"DataFrame successfully loaded to {s3_path}")
     except Exception as e:
         logging.error(f"Failed to load DataFrame to {s3_path}: {e}")
         raise
 
-    
\ No newline at end of file
+
+@instrument_stage()
+def load_df_to_artifact_store(df: pd.DataFrame, store_root: str, aws_conn_id: str) -> str:
+    """
+    Loads a DataFrame as a content-addressed CSV artifact and returns the artifact path.
+
+    """
+    s3_hook, storage_options = get_storage_options(aws_conn_id)
+
+    try:
+        artifact_path = store_df_artifact(df, store_root, storage_options)
+        logging.info(f"DataFrame successfully stored as artifact {artifact_path}")
+    except Exception as e:
+        logging.error(f"Failed to store DataFrame in {store_root}: {e}")
+        raise
+
+    return artifact_path
@@ -1,4 +1,4 @@
-from numpy import int64
+import numpy as np
 import pandas as pd
 
 from include.validations.enrich_schema import validate_output_enrich_schema
@@ -8,6 +8,9 @@ from include.validations.ranking_product_schema import validate_ranking_product_
 from include.validations.revenue_concentration_schema import validate_revenue_concentration_schema
 from include.validations.sales_schema import validate_input_sales_schema, validate_output_sales_schema
 from include.validations.seasonal_sales_schema import validate_output_seasonal_sales_pattern_schema
+from include.etl.calendar_features import add_calendar_features
+from include.timestamps import parse_timestamps
+from include.metrics import instrument_stage
 
 from ..logger import setup_logger
 
@@ -15,6 +18,26 @@ from ..logger import setup_logger
 logging = setup_logger("etl.transform")
 
 
+# Columns each analytics step reads from the enriched data (used for column projection on read)
+HOURLY_SALES_TREND_COLUMNS = ["region", "category", "hour", "total_sales"]
+PRODUCT_SALES_RANKING_COLUMNS = ["brand", "product_id", "category", "rating", "total_sales", "quantity"]
+SEASONAL_SALES_PATTERN_COLUMNS = ["timestamp", "category", "total_sales"]
+REVENUE_CONCENTRATION_COLUMNS = ["region", "total_sales"]
+FUSED_ANALYTICS_COLUMNS = ["region", "category", "hour", "timestamp", "brand", "product_id", "rating", "total_sales", "quantity"]
+
+# Shared group keys of the fused analytics pass
+FUSED_ANALYTICS_KEYS = ["region", "category", "hour", "quarter", "brand", "product_id", "rating"]
+
+# Group keys of the mergeable partial sums behind each analytics output
+SALES_PARTIAL_KEYS = {
+    "hourly_trend": ["region", "category", "hour"],
+    "product_ranking": ["brand", "product_id", "category", "rating"],
+    "seasonal_pattern": ["quarter", "category"],
+    "revenue_concentration": ["region"],
+}
+
+
+@instrument_stage()
 def transform_sales_data(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     Transforms the sales DataFrame by cleaning and formatting.
@@ -29,7 +52,7 @@ def transform_sales_data(sales_df: pd.DataFrame) -> pd.DataFrame:
     sales_df["region"] = sales_df["region"].str.strip().str.lower()
     sales_df = sales_df.dropna(subset=["region", "timestamp"])
     sales_df = sales_df[(sales_df["price"] > 0) & (sales_df["quantity"] > 0)]
-    sales_df["timestamp"] = pd.to_datetime(sales_df["timestamp"], format="mixed", errors="coerce")
+    sales_df["timestamp"] = parse_timestamps(sales_df["timestamp"])
     sales_df['total_sales'] = sales_df['quantity'] * sales_df['price']
     
     sales_df = validate_output_sales_schema(sales_df)
@@ -39,6 +62,7 @@ def transform_sales_data(sales_df: pd.DataFrame) -> pd.DataFrame:
     return sales_df
 
 
+@instrument_stage()
 def transform_products_data(products_df: pd.DataFrame) -> pd.DataFrame:
     """
     Transforms the products DataFrame by cleaning and formatting.
@@ -62,7 +86,8 @@ def transform_products_data(products_df: pd.DataFrame) -> pd.DataFrame:
     return products_df
 
 
-def merge_sales_and_products(sales_df: pd.DataFrame, products_df: pd.DataFrame) -> pd.DataFrame:
+@instrument_stage()
+def merge_sales_and_products(sales_df: pd.DataFrame, products_df: pd.DataFrame, columns: list | None = None) -> pd.DataFrame:
     """
     Merges sales and products DataFrames on product_id.
 
@@ -70,13 +95,70 @@ def merge_sales_and_products(sales_df: pd.DataFrame, products_df: pd.DataFrame)
 
     logging.info("Merging sales and products data")
 
-    merged_df = sales_df.merge(products_df, on="product_id", how="inner")
+    products = index_products(products_df)
+    sales_positions, product_positions = _join_positions(sales_df["product_id"], products.index)
+
+    # Inner join: keep the sales rows whose product exists, in their original order
+    merged_df = sales_df.take(sales_positions).reset_index(drop=True)
+    merged_df = _take_product_attributes(merged_df, products, product_positions, columns)
 
     logging.info("Sales and products data merged successfully")
 
     return merged_df
 
 
+def index_products(products_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Indexes the products dimension by product_id with category and brand stored as dictionary codes.
+
+    """
+    products = products_df.set_index("product_id")
+
+    for column in ["category", "brand"]:
+        products[column] = products[column].astype("category")
+
+    return products
+
+
+def _join_positions(product_ids: pd.Series, products_index: pd.Index) -> tuple:
+    """
+    Returns the sales and product row positions of the inner join on product_id.
+
+    """
+    if products_index.is_unique:
+        positions = products_index.get_indexer(product_ids)
+        matched = positions >= 0
+        return np.flatnonzero(matched), positions[matched]
+
+    logging.warning(f"{products_index.duplicated().sum()} duplicated product_id values, their sales rows are repeated once per product")
+
+    # Same pairs and order as an inner merge, matched on the keys only
+    pairs = pd.DataFrame({"product_id": product_ids.to_numpy(), "sales_position": np.arange(len(product_ids))}).merge(
+        pd.DataFrame({"product_id": products_index.to_numpy(), "product_position": np.arange(len(products_index))}),
+        on="product_id",
+        how="inner"
+    )
+
+    return pairs["sales_position"].to_numpy(), pairs["product_position"].to_numpy()
+
+
+def _take_product_attributes(df: pd.DataFrame, products: pd.DataFrame, positions, columns: list | None) -> pd.DataFrame:
+    """
+    Takes product attributes by position, through the codes for categorical attributes.
+
+    """
+    for column in columns if columns is not None else products.columns:
+        values = products[column]
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            df[column] = pd.Categorical.from_codes(values.cat.codes.to_numpy()[positions], dtype=values.dtype)
+        else:
+            df[column] = values.array.take(positions)
+
+    return df
+
+
+@instrument_stage()
 def enrich_merged_data(merged_df: pd.DataFrame) -> pd.DataFrame:
     """
     Enriches the merged DataFrame with additional calculated fields.
@@ -85,11 +167,8 @@ def enrich_merged_data(merged_df: pd.DataFrame) -> pd.DataFrame:
 
     logging.info("Enriching merged data")
 
-    merged_df["timestamp"] = pd.to_datetime(merged_df["timestamp"], format="mixed", errors="coerce")
-    merged_df["month"] = merged_df["timestamp"].dt.to_period("M").astype(str)
-    merged_df["week"] = merged_df["timestamp"].dt.isocalendar().week
-    merged_df["weekday"] = merged_df["timestamp"].dt.day_name()
-    merged_df["hour"] = merged_df["timestamp"].dt.hour.astype(int64)
+    merged_df["timestamp"] = parse_timestamps(merged_df["timestamp"])
+    merged_df = add_calendar_features(merged_df, "timestamp")
 
     merged_df["sales_bucket"] = pd.cut(
         merged_df["total_sales"],
@@ -102,6 +181,7 @@ def enrich_merged_data(merged_df: pd.DataFrame) -> pd.DataFrame:
     return validate_output_enrich_schema(merged_df)
 
 
+@instrument_stage()
 def hourly_sales_trend(enriched_df: pd.DataFrame) -> pd.DataFrame:
     """
     Aggregates enriched DataFrame to get hourly sales trends.
@@ -110,15 +190,15 @@ def hourly_sales_trend(enriched_df: pd.DataFrame) -> pd.DataFrame:
 
     logging.info("Calculating hourly sales trend")
 
-    agg = enriched_df.groupby(by=["region", "category", "hour"], as_index=False).agg(hourly_sales_trend=("total_sales", "sum"))
-    idx = agg.groupby(['region', 'category'])['hourly_sales_trend'].idxmax()
-    peaks = agg.loc[idx].reset_index(drop=True)
+    agg = enriched_df.groupby(by=["region", "category", "hour"], as_index=False, observed=True).agg(hourly_sales_trend=("total_sales", "sum"))
+    peaks = _hourly_sales_peaks(agg)
 
     logging.info("Hourly sales trend calculated successfully")
 
     return validate_output_hourly_sales_trend_schema(peaks)
 
 
+@instrument_stage()
 def product_sales_ranking_with_brand(enriched_df: pd.DataFrame) -> pd.DataFrame:
     """
     Ranks products based on total sales within each brand.
@@ -127,19 +207,15 @@ def product_sales_ranking_with_brand(enriched_df: pd.DataFrame) -> pd.DataFrame:
 
     logging.info("Calculating product sales ranking within brand")
 
-    ranking_df = enriched_df.groupby(by=["brand", "product_id", "category", "rating"], as_index=False).agg(revenue=("total_sales", "sum"), sales_count=("quantity", "sum"))
-    ranking_df["revenue"] = ranking_df["revenue"].round(2)
-    ranking_df["value_bucket"] = pd.qcut(
-        ranking_df["revenue"],
-        q=[0, 0.2, 0.8, 1.0],
-        labels=["Low Performer", "Average", "Bestseller"]
-    )
+    ranking_df = enriched_df.groupby(by=["brand", "product_id", "category", "rating"], as_index=False, observed=True).agg(revenue=("total_sales", "sum"), sales_count=("quantity", "sum"))
+    ranking_df = _product_value_buckets(ranking_df)
 
     logging.info("Product sales ranking within brand calculated successfully")
 
     return validate_ranking_product_schema(ranking_df)
 
 
+@instrument_stage()
 def seasonal_sales_pattern(enriched_df: pd.DataFrame) -> pd.DataFrame:
     """
     Analyzes seasonal sales patterns from the enriched DataFrame.
@@ -148,15 +224,16 @@ def seasonal_sales_pattern(enriched_df: pd.DataFrame) -> pd.DataFrame:
 
     logging.info("Analyzing seasonal sales patterns")
 
-    enriched_df["timestamp"] = pd.to_datetime(enriched_df["timestamp"], format="mixed", errors="coerce")
+    enriched_df["timestamp"] = parse_timestamps(enriched_df["timestamp"])
     enriched_df["quarter"] = enriched_df["timestamp"].dt.to_period("Q").astype(str)
-    seasonal_df = enriched_df.groupby(by=["quarter", "category"], as_index=False).agg(total_sales=("total_sales", "sum"))
+    seasonal_df = enriched_df.groupby(by=["quarter", "category"], as_index=False, observed=True).agg(total_sales=("total_sales", "sum"))
 
     logging.info("Seasonal sales patterns analyzed successfully")
 
     return validate_output_seasonal_sales_pattern_schema(seasonal_df)
 
 
+@instrument_stage()
 def revenue_concentration(enriched_df: pd.DataFrame) -> pd.DataFrame:
     """
     Analyzes revenue concentration across different regions.
@@ -165,12 +242,96 @@ def revenue_concentration(enriched_df: pd.DataFrame) -> pd.DataFrame:
 
     logging.info("Analyzing revenue concentration across regions")
 
-    revenue_df = enriched_df.groupby(by=["region"], as_index=False).agg(region_revenue=("total_sales", "sum"))
-    total_revenue = revenue_df["region_revenue"].sum()
-    revenue_df["revenue_share"] = revenue_df["region_revenue"] / total_revenue
-    revenue_df["cumulative_share"] = revenue_df["revenue_share"].cumsum()
+    revenue_df = enriched_df.groupby(by=["region"], as_index=False, observed=True).agg(region_revenue=("total_sales", "sum"))
+    revenue_df = _revenue_shares(revenue_df)
 
     logging.info("Revenue concentration analysis completed successfully")
 
     return validate_revenue_concentration_schema(revenue_df)
 
+
+@instrument_stage()
+def fused_sales_analytics(enriched_df: pd.DataFrame) -> dict:
+    """
+    Computes hourly trend, product ranking, seasonal pattern and revenue concentration in one pass.
+
+    """
+
+    logging.info("Calculating fused sales analytics")
+
+    partials = compute_sales_partials(enriched_df)
+    results = sales_analytics_from_partials(partials)
+
+    logging.info("Fused sales analytics calculated successfully")
+
+    return results
+
+
+@instrument_stage()
+def compute_sales_partials(enriched_df: pd.DataFrame) -> dict:
+    """
+    Computes the mergeable partial sums behind every analytics output with a single scan of the rows.
+
+    """
+    enriched_df["timestamp"] = parse_timestamps(enriched_df["timestamp"])
+    enriched_df["quarter"] = enriched_df["timestamp"].dt.to_period("Q").astype(str)
+
+    # One scan over the rows; every partial is re-aggregated from this (much smaller) frame
+    base_df = enriched_df.groupby(by=FUSED_ANALYTICS_KEYS, as_index=False, observed=True, dropna=False).agg(total_sales=("total_sales", "sum"), quantity=("quantity", "sum"))
+
+    logging.info(f"Sales partials computed from {len(enriched_df)} rows into {len(base_df)} grouped rows")
+
+    return {
+        "hourly_trend": base_df.groupby(by=SALES_PARTIAL_KEYS["hourly_trend"], as_index=False, observed=True).agg(hourly_sales_trend=("total_sales", "sum")),
+        "product_ranking": base_df.groupby(by=SALES_PARTIAL_KEYS["product_ranking"], as_index=False, observed=True).agg(revenue=("total_sales", "sum"), sales_count=("quantity", "sum")),
+        "seasonal_pattern": base_df.groupby(by=SALES_PARTIAL_KEYS["seasonal_pattern"], as_index=False, observed=True).agg(total_sales=("total_sales", "sum")),
+        "revenue_concentration": base_df.groupby(by=SALES_PARTIAL_KEYS["revenue_concentration"], as_index=False, observed=True).agg(region_revenue=("total_sales", "sum")),
+    }
+
+
+@instrument_stage()
+def sales_analytics_from_partials(partials: dict) -> dict:
+    """
+    Builds the validated analytics outputs from (possibly merged) partial sums.
+
+    """
+    return {
+        "hourly_trend": validate_output_hourly_sales_trend_schema(_hourly_sales_peaks(partials["hourly_trend"].copy())),
+        "product_ranking": validate_ranking_product_schema(_product_value_buckets(partials["product_ranking"].copy())),
+        "seasonal_pattern": validate_output_seasonal_sales_pattern_schema(partials["seasonal_pattern"].copy()),
+        "revenue_concentration": validate_revenue_concentration_schema(_revenue_shares(partials["revenue_concentration"].copy())),
+    }
+
+
+def _hourly_sales_peaks(hourly_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keeps the peak hour for every region and category.
+
+    """
+    idx = hourly_df.groupby(['region', 'category'], observed=True)['hourly_sales_trend'].idxmax()
+    return hourly_df.loc[idx].reset_index(drop=True)
+
+
+def _product_value_buckets(ranking_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rounds product revenue and assigns value buckets by revenue quantiles.
+
+    """
+    ranking_df["revenue"] = ranking_df["revenue"].round(2)
+    ranking_df["value_bucket"] = pd.qcut(
+        ranking_df["revenue"],
+        q=[0, 0.2, 0.8, 1.0],
+        labels=["Low Performer", "Average", "Bestseller"]
+    )
+    return ranking_df
+
+
+def _revenue_shares(revenue_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds revenue share and cumulative share columns to regional revenue.
+
+    """
+    total_revenue = revenue_df["region_revenue"].sum()
+    revenue_df["revenue_share"] = revenue_df["region_revenue"] / total_revenue
+    revenue_df["cumulative_share"] = revenue_df["revenue_share"].cumsum()
+    return revenue_df
@@ -0,0 +1,195 @@
+import functools
+import json
+import os
+import socket
+import time
+
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import fsspec
+import pandas as pd
+
+from .logger import setup_logger
+
+
+logging = setup_logger("metrics")
+
+
+_settings = {
+    "jsonl_path": None,
+    "statsd_address": None,
+    "prometheus_dir": None,
+    "prefix": "etl",
+    "deep_memory": False,
+}
+_current_record: ContextVar = ContextVar("current_stage_record", default=None)
+
+
+def configure_metrics(jsonl_path: str | None = None, statsd_host: str | None = None, statsd_port: int = 8125,
+                      prometheus_dir: str | None = None, prefix: str = "etl", deep_memory: bool = False) -> None:
+    """
+    Configures where stage metrics are exported: a JSON lines file, a StatsD sink and a Prometheus textfile directory.
+
+    """
+    _settings["jsonl_path"] = jsonl_path
+    _settings["statsd_address"] = (statsd_host, statsd_port) if statsd_host else None
+    _settings["prometheus_dir"] = prometheus_dir
+    _settings["prefix"] = prefix
+    _settings["deep_memory"] = deep_memory
+
+
+def record_io(bytes_read: int = 0, bytes_written: int = 0) -> None:
+    """
+    Adds bytes read and written to the metrics of the stage currently running.
+
+    """
+    record = _current_record.get()
+
+    if record is not None:
+        record["bytes_read"] += bytes_read
+        record["bytes_written"] += bytes_written
+
+
+def record_file_read(path: str, storage_options: dict | None = None) -> None:
+    """
+    Adds the size of a file read by the stage currently running to its bytes read.
+
+    """
+    if _current_record.get() is not None:
+        fs, fs_path = fsspec.core.url_to_fs(path, **(storage_options or {}))
+        record_io(bytes_read=fs.size(fs_path))
+
+
+def instrument_stage(stage: str | None = None):
+    """
+    Decorates a transform, validation or load function to emit wall time, CPU time, rows, bytes and memory per call.
+
+    """
+    def decorator(func):
+        stage_name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            frames_in = _frames_in([*args, *kwargs.values()])
+            record = {
+                "stage": stage_name,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "status": "success",
+                "rows_in": sum(len(df) for df in frames_in),
+                "rows_out": 0,
+                "bytes_read": 0,
+                "bytes_written": 0,
+                "memory_before_bytes": _memory_usage(frames_in),
+                "memory_after_bytes": 0,
+            }
+            token = _current_record.set(record)
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+            try:
+                result = func(*args, **kwargs)
+                frames_out = _frames_in([result])
+                record["rows_out"] = sum(len(df) for df in frames_out)
+                record["memory_after_bytes"] = _memory_usage(frames_out)
+                return result
+            except Exception:
+                record["status"] = "error"
+                raise
+            finally:
+                record["wall_seconds"] = round(time.perf_counter() - wall_start, 6)
+                record["cpu_seconds"] = round(time.process_time() - cpu_start, 6)
+                _current_record.reset(token)
+                emit_stage_metrics(record)
+
+        return wrapper
+
+    return decorator
+
+
+def emit_stage_metrics(record: dict) -> None:
+    """
+    Emits one stage record to the log, the JSON lines file, StatsD and the Prometheus textfile directory.
+
+    """
+    line = json.dumps(record)
+    logging.info(line)
+
+    try:
+        if _settings["jsonl_path"]:
+            os.makedirs(os.path.dirname(_settings["jsonl_path"]) or ".", exist_ok=True)
+            with open(_settings["jsonl_path"], "a") as file:
+                file.write(line + "\n")
+
+        if _settings["statsd_address"]:
+            _send_statsd(record)
+
+        if _settings["prometheus_dir"]:
+            _write_prometheus_textfile(record)
+    except OSError as e:
+        # Metrics must never fail the pipeline
+        logging.warning(f"Failed to export metrics for stage {record['stage']}: {e}")
+
+
+def _send_statsd(record: dict) -> None:
+    """
+    Sends the record as StatsD timers and gauges over UDP.
+
+    """
+    prefix = f"{_settings['prefix']}.{record['stage']}"
+    packets = [
+        f"{prefix}.wall_time:{record['wall_seconds'] * 1000:.3f}|ms",
+        f"{prefix}.cpu_time:{record['cpu_seconds'] * 1000:.3f}|ms",
+        f"{prefix}.calls.{record['status']}:1|c",
+    ] + [
+        f"{prefix}.{name}:{record[name]}|g"
+        for name in ["rows_in", "rows_out", "bytes_read", "bytes_written", "memory_before_bytes", "memory_after_bytes"]
+    ]
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.sendto("\n".join(packets).encode("utf-8"), _settings["statsd_address"])
+
+
+def _write_prometheus_textfile(record: dict) -> None:
+    """
+    Writes the latest values of a stage in the Prometheus textfile collector format.
+
+    """
+    prefix = _settings["prefix"]
+    labels = f'stage="{record["stage"]}",status="{record["status"]}"'
+    lines = [
+        f"{prefix}_stage_{name}{{{labels}}} {record[name]}"
+        for name in ["wall_seconds", "cpu_seconds", "rows_in", "rows_out", "bytes_read", "bytes_written",
+                     "memory_before_bytes", "memory_after_bytes"]
+    ]
+
+    os.makedirs(_settings["prometheus_dir"], exist_ok=True)
+    path = os.path.join(_settings["prometheus_dir"], f"{prefix}_{record['stage']}.prom")
+
+    # Write then rename, so the collector never reads a half written file
+    with open(f"{path}.tmp", "w") as file:
+        file.write("\n".join(lines) + "\n")
+    os.replace(f"{path}.tmp", path)
+
+
+def _frames_in(values: list) -> list:
+    """
+    Collects the DataFrames among call arguments or results, including those inside dicts.
+
+    """
+    frames = []
+
+    for value in values:
+        if isinstance(value, pd.DataFrame):
+            frames.append(value)
+        elif isinstance(value, dict):
+            frames.extend(item for item in value.values() if isinstance(item, pd.DataFrame))
+
+    return frames
+
+
+def _memory_usage(frames: list) -> int:
+    """
+    Sums the memory of the given DataFrames (deep only when configured, as it scans object columns).
+
+    """
+    return int(sum(df.memory_usage(index=True, deep=_settings["deep_memory"]).sum() for df in frames))
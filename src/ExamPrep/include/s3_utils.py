@@ -1,17 +1,97 @@
+import os
+import threading
+
+import fsspec
+
 from airflow.providers.amazon.aws.hooks.s3 import S3Hook  # type: ignore
+from botocore.config import Config
+
+
+# Hooks, clients and credentials are pooled per connection id for the lifetime of the worker process
+MAX_POOL_CONNECTIONS_ENV = "S3_MAX_POOL_CONNECTIONS"
+
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+
+_pool_lock = threading.Lock()
+_pool: dict = {}
 
 
 def get_storage_options(aws_conn_id: str):
     """
-    Retrieves storage options for accessing S3 using the provided S3Hook.
+    Retrieves storage options for accessing S3 using the provided S3Hook,
+    both reused across calls until the credentials are about to expire.
+
+    """
+    entry = _pooled_connection(aws_conn_id)
+
+    return entry["hook"], dict(entry["storage_options"])
+
+
+def get_s3_client(aws_conn_id: str):
+    """
+    Returns the pooled boto3 S3 client of a connection, its HTTP connections are reused across calls.
+
+    """
+    return _pooled_connection(aws_conn_id)["hook"].get_conn()
+
+
+def get_s3_filesystem(aws_conn_id: str) -> fsspec.AbstractFileSystem:
+    """
+    Returns the S3 filesystem of a connection, fsspec keeps one instance per storage options.
+
+    """
+    return fsspec.filesystem("s3", **_pooled_connection(aws_conn_id)["storage_options"])
+
+
+def clear_s3_pool() -> None:
+    """
+    Drops every pooled hook and credential, e.g. after a connection changed.
+
+    """
+    with _pool_lock:
+        _pool.clear()
+
+
+def _pooled_connection(aws_conn_id: str) -> dict:
+    """
+    Returns the pooled hook and storage options of a connection, creating them or rebuilding them from renewed credentials.
 
     """
-    s3_hook = S3Hook(aws_conn_id=aws_conn_id)
-    credentials = s3_hook.get_credentials()
+    with _pool_lock:
+        entry = _pool.get(aws_conn_id)
 
+        if entry is None:
+            max_pool_connections = int(os.environ.get(MAX_POOL_CONNECTIONS_ENV, DEFAULT_MAX_POOL_CONNECTIONS))
+            hook = S3Hook(aws_conn_id=aws_conn_id, config=Config(max_pool_connections=max_pool_connections))
+            entry = _pool[aws_conn_id] = {
+                "hook": hook,
+                "max_pool_connections": max_pool_connections,
+                "credentials": hook.get_session().get_credentials(),
+                "frozen": None,
+            }
+
+        # Refreshable credentials renew themselves ahead of their expiry when frozen, static keys never change
+        frozen = entry["credentials"].get_frozen_credentials()
+
+        if frozen != entry["frozen"]:
+            _set_storage_options(entry, frozen)
+
+        return entry
+
+
+def _set_storage_options(entry: dict, frozen) -> None:
+    """
+    Rebuilds the storage options of a pooled connection from a snapshot of its credentials.
+
+    """
     storage_options = {
-        "key": credentials.access_key,
-        "secret": credentials.secret_key,
+        "key": frozen.access_key,
+        "secret": frozen.secret_key,
+        "config_kwargs": {"max_pool_connections": entry["max_pool_connections"]},
     }
 
-    return s3_hook, storage_options
+    if frozen.token:
+        storage_options["token"] = frozen.token
+
+    entry["storage_options"] = storage_options
+    entry["frozen"] = frozen
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from pandas.tseries.api import guess_datetime_format
+
+from .logger import setup_logger
+
+
+logging = setup_logger("timestamps")
+
+
+# Least recently used parsed strings, one cache per format: explicit formats by name,
+# inferred ones as ("inferred", format) since those fall back to mixed parsing
+CACHE_SIZE = 100_000
+MIXED_FORMAT = "mixed"
+_parsed_cache: dict = {}
+
+
+def parse_timestamps(values: pd.Series, format: str | None = None, sample_size: int = 1000) -> pd.Series:
+    """
+    Parses timestamp strings in bulk, parsing each distinct value only once and reporting NaT conversions.
+
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    if not pd.api.types.is_object_dtype(values) and not pd.api.types.is_string_dtype(values):
+        parsed = pd.to_datetime(values, format=format or MIXED_FORMAT, errors="coerce")
+        _report_nat_values(values, parsed)
+        return parsed
+
+    codes, uniques = pd.factorize(values)
+    parsed_uniques = _parse_distinct_values(pd.Index(uniques.astype(str)), format, sample_size)
+
+    # Code -1 (missing input) picks the NaT appended at the end
+    parsed_uniques = parsed_uniques.insert(len(parsed_uniques), pd.NaT)
+    parsed = pd.Series(parsed_uniques.take(codes), index=values.index, name=values.name)
+
+    _report_nat_values(values, parsed)
+
+    return parsed
+
+
+def _parse_distinct_values(uniques: pd.Index, format: str | None, sample_size: int) -> pd.Index:
+    """
+    Parses distinct strings, serving previously seen ones from the cache of the format they are parsed with.
+
+    """
+    # Ambiguous strings (e.g. 01/02/2024) parse differently per format, so the format is settled before the cache lookup
+    if format is None:
+        inferred_format = _infer_format(uniques, sample_size)
+        cache_key = ("inferred", inferred_format) if inferred_format else MIXED_FORMAT
+    else:
+        inferred_format, cache_key = None, format
+
+    cache = _parsed_cache.get(cache_key, pd.Series(dtype="datetime64[ns]"))
+    positions = cache.index.get_indexer(uniques)
+    missing = positions < 0
+
+    if not missing.any():
+        _parsed_cache[cache_key] = _touch(cache, positions)
+        return pd.DatetimeIndex(cache.to_numpy()[positions])
+
+    parsed_misses = _parse_in_bulk(uniques[missing], format or inferred_format, fallback=format is None)
+
+    if not isinstance(parsed_misses, pd.DatetimeIndex) or parsed_misses.tz is not None:
+        # Time zone aware values are not cached, parse everything in one go instead
+        return _parse_in_bulk(uniques, format or inferred_format, fallback=format is None)
+
+    parsed_misses = parsed_misses.astype("datetime64[ns]")
+
+    parsed = np.empty(len(uniques), dtype="datetime64[ns]")
+    parsed[~missing] = cache.to_numpy()[positions[~missing]]
+    parsed[missing] = parsed_misses.to_numpy()
+
+    cache = pd.concat([_touch(cache, positions[~missing]), pd.Series(parsed_misses.to_numpy(), index=uniques[missing])])
+    _parsed_cache[cache_key] = cache.iloc[-CACHE_SIZE:]
+
+    return pd.DatetimeIndex(parsed)
+
+
+def _touch(cache: pd.Series, positions: np.ndarray) -> pd.Series:
+    """
+    Moves the cache entries at positions to the end, the least recently used entries stay first and are evicted first.
+
+    """
+    used = np.zeros(len(cache), dtype=bool)
+    used[positions] = True
+
+    return pd.concat([cache[~used], cache[used]])
+
+
+def _parse_in_bulk(values: pd.Index, format: str | None, fallback: bool = False) -> pd.Index:
+    """
+    Parses strings with one vectorized format, with fallback only the values that do not match it are parsed as mixed.
+
+    """
+    if format is None:
+        return pd.to_datetime(values, format=MIXED_FORMAT, errors="coerce")
+
+    parsed = pd.to_datetime(values, format=format, errors="coerce")
+    failed = parsed.isna()
+
+    if not fallback or not failed.any() or parsed.tz is not None:
+        return parsed
+
+    fallback_values = pd.to_datetime(values[failed], format=MIXED_FORMAT, errors="coerce")
+
+    if not isinstance(fallback_values, pd.DatetimeIndex) or fallback_values.tz is not None:
+        return pd.to_datetime(values, format=MIXED_FORMAT, errors="coerce")
+
+    parsed_values = parsed.to_numpy().copy()
+    parsed_values[failed] = fallback_values.to_numpy()
+
+    return pd.DatetimeIndex(parsed_values)
+
+
+def _infer_format(values: pd.Index, sample_size: int) -> str | None:
+    """
+    Infers the most common datetime format in a sample of the values.
+
+    """
+    guesses = pd.Series([guess_datetime_format(value) for value in values[:sample_size]], dtype=object)
+    counts = guesses.value_counts()
+
+    return counts.index[0] if not counts.empty else None
+
+
+def _report_nat_values(values: pd.Series, parsed: pd.Series) -> None:
+    """
+    Logs how many non-missing values could not be parsed and became NaT.
+
+    """
+    nat_count = int((parsed.isna() & values.notna()).sum())
+
+    if nat_count:
+        logging.warning(f"{nat_count} of {len(values)} values in '{values.name}' could not be parsed and became NaT")
+    else:
+        logging.info(f"Parsed {len(values)} values in '{values.name}' without NaT conversions")
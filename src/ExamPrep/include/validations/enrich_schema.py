@@ -3,6 +3,8 @@ import pandera.pandas as pa
 
 from pandera.pandas import DataFrameSchema, Column, Check
 
+from .fast_validation import validate_fast
+from ..metrics import instrument_stage
 from ..logger import setup_logger
 
 
@@ -28,6 +30,7 @@ enrich_output_schema = DataFrameSchema(
     })
 
 
+@instrument_stage()
 def validate_output_enrich_schema(enrich_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the enriched DataFrame against the predefined schema.
@@ -35,4 +38,4 @@ def validate_output_enrich_schema(enrich_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating enriched data schema")
     
-    return enrich_output_schema.validate(enrich_df)
+    return validate_fast(enrich_output_schema, enrich_df)
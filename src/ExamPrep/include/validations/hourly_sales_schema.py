@@ -3,6 +3,8 @@ import pandera.pandas as pa
 
 from pandera.pandas import DataFrameSchema, Column, Check
 
+from .fast_validation import validate_fast
+from ..metrics import instrument_stage
 from ..logger import setup_logger
 
 
@@ -17,6 +19,7 @@ hourly_sales_trend_schema = DataFrameSchema(
     })  
 
 
+@instrument_stage()
 def validate_output_hourly_sales_trend_schema(hourly_sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the hourly sales DataFrame against the predefined schema.
@@ -24,5 +27,5 @@ def validate_output_hourly_sales_trend_schema(hourly_sales_df: pd.DataFrame) ->
     """
     logging.info("Validating hourly sales data schema")
     
-    return hourly_sales_trend_schema.validate(hourly_sales_df)
+    return validate_fast(hourly_sales_trend_schema, hourly_sales_df)
 
@@ -4,6 +4,8 @@ import pandera.pandas as pa
 from pandera.pandas import DataFrameSchema, Column, Check
 from pandera.errors import SchemaErrors
 
+from .fast_validation import validate_fast
+from ..metrics import instrument_stage
 from ..logger import setup_logger
 
 
@@ -26,6 +28,7 @@ product_output_schema = DataFrameSchema(
     })
 
 
+@instrument_stage()
 def validate_input_products_schema(products_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the input products DataFrame against the predefined schema.
@@ -34,13 +37,14 @@ def validate_input_products_schema(products_df: pd.DataFrame) -> pd.DataFrame:
     logging.info("Validating pre-products data schema")
     
     try:
-        product_input_schema.validate(products_df)
+        validate_fast(product_input_schema, products_df)
         logging.info("Pre-products data schema validation passed")
         return products_df
     except SchemaErrors as e:
         logging.warning(f"Pre-products data schema validation failed: {e.failure_cases}")
         return products_df
 
+@instrument_stage()
 def validate_output_products_schema(products_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the output products DataFrame against the predefined schema.
@@ -48,4 +52,4 @@ def validate_output_products_schema(products_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating output products data schema")
     
-    return product_output_schema.validate(products_df)
+    return validate_fast(product_output_schema, products_df)
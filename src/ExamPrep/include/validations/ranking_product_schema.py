@@ -3,6 +3,8 @@ import pandera.pandas as pa
 
 from pandera.pandas import DataFrameSchema, Column, Check
 
+from .fast_validation import validate_fast
+from ..metrics import instrument_stage
 from ..logger import setup_logger
 
 
@@ -18,6 +20,7 @@ ranking_product_schema = DataFrameSchema(
     })
 
 
+@instrument_stage()
 def validate_ranking_product_schema(ranking_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the ranking products DataFrame against the predefined schema.
@@ -25,4 +28,4 @@ def validate_ranking_product_schema(ranking_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating ranking products data schema")
     
-    return ranking_product_schema.validate(ranking_df)
+    return validate_fast(ranking_product_schema, ranking_df)
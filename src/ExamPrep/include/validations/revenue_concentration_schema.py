@@ -3,6 +3,8 @@ import pandera.pandas as pa
 
 from pandera.pandas import DataFrameSchema, Column, Check
 
+from .fast_validation import validate_fast
+from ..metrics import instrument_stage
 from ..logger import setup_logger
 
 
@@ -18,6 +20,7 @@ revenue_concentration_schema = DataFrameSchema(
     })
 
 
+@instrument_stage()
 def validate_revenue_concentration_schema(revenue_concentration_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the revenue concentration DataFrame against the predefined schema.
@@ -25,5 +28,5 @@ def validate_revenue_concentration_schema(revenue_concentration_df: pd.DataFrame
     """
     logging.info("Validating revenue concentration data schema")
     
-    return revenue_concentration_schema.validate(revenue_concentration_df)
+    return validate_fast(revenue_concentration_schema, revenue_concentration_df)
 
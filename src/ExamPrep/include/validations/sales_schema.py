@@ -4,6 +4,8 @@ import pandera.pandas as pa
 from pandera.pandas import DataFrameSchema, Column, Check
 from pandera.errors import SchemaErrors
 
+from .fast_validation import validate_fast
+from ..metrics import instrument_stage
 from ..logger import setup_logger
 
 
@@ -32,6 +34,7 @@ sales_output_schema = DataFrameSchema(
     })
 
 
+@instrument_stage()
 def validate_input_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the input sales DataFrame against the predefined schema.
@@ -40,13 +43,14 @@ def validate_input_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
     logging.info("Validating pre-sales data schema")
     
     try:
-        sales_input_schema.validate(sales_df)
+        validate_fast(sales_input_schema, sales_df)
         logging.info("Pre-sales data schema validation passed")
         return sales_df
     except SchemaErrors as e:
         logging.warning(f"Pre-sales data schema validation failed: {e.failure_cases}")
         return sales_df
 
+@instrument_stage()
 def validate_output_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the output sales DataFrame against the predefined schema.
@@ -54,4 +58,4 @@ def validate_output_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating output sales data schema")
     
-    return sales_output_schema.validate(sales_df)
+    return validate_fast(sales_output_schema, sales_df)
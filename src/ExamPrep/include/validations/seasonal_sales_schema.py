@@ -3,6 +3,8 @@ import pandera.pandas as pa
 
 from pandera.pandas import DataFrameSchema, Column, Check
 
+from .fast_validation import validate_fast
+from ..metrics import instrument_stage
 from ..logger import setup_logger
 
 
@@ -17,6 +19,7 @@ seasonal_sales_pattern_schema = DataFrameSchema(
     })
 
 
+@instrument_stage()
 def validate_output_seasonal_sales_pattern_schema(seasonal_sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the seasonal sales pattern DataFrame against the predefined schema.
@@ -24,5 +27,5 @@ def validate_output_seasonal_sales_pattern_schema(seasonal_sales_df: pd.DataFram
     """
     logging.info("Validating seasonal sales pattern data schema")
     
-    return seasonal_sales_pattern_schema.validate(seasonal_sales_df)
+    return validate_fast(seasonal_sales_pattern_schema, seasonal_sales_df)
 
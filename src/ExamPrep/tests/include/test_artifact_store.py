@@ -0,0 +1,58 @@
+"""Content-addressed artifact store: identical outputs are stored once and published without a new upload."""
+
+import pandas as pd
+import pytest
+
+from include import artifact_store
+from include.artifact_store import publish_artifact, store_df_artifact
+
+
+@pytest.fixture
+def fs_calls(tmp_path, monkeypatch):
+    """
+    Counts the uploads (pipe_file) and server-side copies (copy) made on the local filesystem
+    """
+    calls = {"pipe_file": 0, "copy": 0}
+    fs_class = type(artifact_store.get_filesystem(str(tmp_path)))
+
+    for name in calls:
+        original = getattr(fs_class, name)
+
+        def counted(self, *args, _name=name, _original=original, **kwargs):
+            calls[_name] += 1
+            return _original(self, *args, **kwargs)
+
+        monkeypatch.setattr(fs_class, name, counted)
+
+    return calls
+
+
+def test_store_is_content_addressed(tmp_path, fs_calls):
+    """
+    test that the same content is stored once under its digest and different content under another path
+    """
+    store_root = str(tmp_path / "store")
+    df = pd.DataFrame({"region": ["north", "south"], "total_sales": [10.0, 20.5]})
+
+    first_path = store_df_artifact(df, store_root)
+    second_path = store_df_artifact(df.copy(), store_root)
+    other_path = store_df_artifact(df.assign(total_sales=[10.0, 21.0]), store_root)
+
+    assert first_path == second_path != other_path
+    assert fs_calls["pipe_file"] == 2
+    pd.testing.assert_frame_equal(pd.read_csv(first_path), df)
+
+
+def test_publish_skips_unchanged_output(tmp_path, fs_calls):
+    """
+    test that publishing an artifact copies it once and skips the copy while the output holds the same bytes
+    """
+    df = pd.DataFrame({"region": ["north", "south"], "total_sales": [10.0, 20.5]})
+    artifact_path = store_df_artifact(df, str(tmp_path / "store"))
+    output_path = str(tmp_path / "output" / "revenue_concentration.csv")
+
+    assert publish_artifact(artifact_path, output_path) == output_path
+    assert publish_artifact(artifact_path, output_path) == output_path
+
+    assert fs_calls == {"pipe_file": 1, "copy": 1}
+    pd.testing.assert_frame_equal(pd.read_csv(output_path), df)
@@ -1,27 +1,41 @@
+import threading
+
 import boto3
 import s3fs
 import fsspec
 
-from config.settings import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY
+from botocore.config import Config
+from config.settings import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, S3_MAX_POOL_CONNECTIONS
+
+
+# One client per process, its HTTP connection pool is reused by every call
+_client_lock = threading.Lock()
+_s3_client = None
 
 
 def get_s3_client_and_storage_options() -> tuple[boto3.client, dict]:
     """
-    Create an S3 client and corresponding storage options for fsspec.
+    Return the shared S3 client and corresponding storage options for fsspec.
 
     Returns:
         A tuple containing the S3 client and a dictionary of storage options.
     """
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        )
-    
+    global _s3_client
+
+    with _client_lock:
+        if _s3_client is None:
+            _s3_client = boto3.client(
+                's3',
+                aws_access_key_id=AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS),
+                )
+
+    # Same options on every call, so fsspec reuses one filesystem instance
     storage_options = {
-        'key': s3_client._request_signer._credentials.access_key,
-        'secret': s3_client._request_signer._credentials.secret_key,
+        'key': _s3_client._request_signer._credentials.access_key,
+        'secret': _s3_client._request_signer._credentials.secret_key,
+        'config_kwargs': {'max_pool_connections': S3_MAX_POOL_CONNECTIONS},
     }
 
-    return s3_client, storage_options
-
+    return _s3_client, storage_options
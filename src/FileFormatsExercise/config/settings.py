@@ -4,6 +4,7 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 
 AWS_ACCESS_KEY_ID = ''
 AWS_SECRET_ACCESS_KEY = ''
+S3_MAX_POOL_CONNECTIONS = 32
 
 BUCKET_NAME = 'iva-data-warehouse-10'
 
@@ -1,5 +1,3 @@
-import pandas as pd
-
 from airflow.sdk import dag, task, task_group
 from airflow.sdk.exceptions import AirflowException
 from airflow.utils import yaml
@@ -7,10 +5,14 @@ from pendulum import datetime
 
 from pathlib import Path
 
-from include.etl.extract_s3 import extract_data_from_s3
+from include.etl.extract_s3 import extract_data_from_s3, inputs_changed, list_s3_manifest, read_cached_manifest, save_manifest
 from include.etl.load_s3_csv import load_df_to_s3_csv
+from include.etl.readers import read_typed_csv, read_typed_json
 from include.etl.transform import transform_products_data, transform_sales_data
+from include.metrics import configure_metrics
 from include.s3_utils import get_storage_options
+from include.validations.fast_validation import set_validation_mode
+from include.validations.input_schemas import product_input_schema, sales_input_schema
 
 
 # Get the absolute path to config file
@@ -18,6 +20,9 @@ config_path = Path(__file__).parent.parent / "include" / "config.yaml"
 with open(config_path, "r") as file:
     config = yaml.safe_load(file)
 
+set_validation_mode(config["validation"]["mode"], config["validation"]["sample_size"])
+configure_metrics(**config["metrics"])
+
 
 @dag(
     start_date=datetime(2025, 1, 1),
@@ -32,15 +37,19 @@ def retail_etl_dag():
     def extract_group():
 
         @task
-        def extract_csv_from_s3(bucket: str, folder: str, aws_conn_id: str) -> list:
+        def list_inputs(bucket: str, folder: str, aws_conn_id: str) -> list:
+            return list_s3_manifest(bucket=bucket, folder=folder, aws_conn_id=aws_conn_id)
+
+        @task
+        def extract_csv_from_s3(manifest: list, bucket: str, folder: str, aws_conn_id: str) -> list:
             return extract_data_from_s3(
-                bucket=bucket, folder=folder, aws_conn_id=aws_conn_id, file_type="csv"
+                bucket=bucket, folder=folder, aws_conn_id=aws_conn_id, file_type="csv", manifest=manifest
             )
 
         @task
-        def extract_json_from_s3(bucket: str, folder: str, aws_conn_id: str) -> list:
+        def extract_json_from_s3(manifest: list, bucket: str, folder: str, aws_conn_id: str) -> list:
             return extract_data_from_s3(
-                bucket=bucket, folder=folder, aws_conn_id=aws_conn_id, file_type="json"
+                bucket=bucket, folder=folder, aws_conn_id=aws_conn_id, file_type="json", manifest=manifest
             )
 
         @task
@@ -57,16 +66,21 @@ def retail_etl_dag():
                     return path
             raise AirflowException("No products file found in the provided paths.")
         
-        csv_paths = extract_csv_from_s3(
+        # One listing of the input prefix, shared by both file types
+        manifest = list_inputs(
             bucket=config["s3"]["bucket"], folder=config["s3"]["input_folder"], aws_conn_id=config["aws_conn_id"])
+
+        csv_paths = extract_csv_from_s3(
+            manifest, bucket=config["s3"]["bucket"], folder=config["s3"]["input_folder"], aws_conn_id=config["aws_conn_id"])
         json_paths = extract_json_from_s3(
-            bucket=config["s3"]["bucket"], folder=config["s3"]["input_folder"], aws_conn_id=config["aws_conn_id"])
+            manifest, bucket=config["s3"]["bucket"], folder=config["s3"]["input_folder"], aws_conn_id=config["aws_conn_id"])
         
 
         sales_path = get_sales_path(csv_paths)
         products_path = get_products_path(json_paths)
 
         return {
+            "manifest": manifest,
             "sales_path": sales_path,
             "products_path": products_path
         }
@@ -77,7 +91,7 @@ def retail_etl_dag():
         
         @task()
         def transform_sales(sales_path: str):
-            sales_df = pd.read_csv(sales_path, storage_options=storage_options)
+            sales_df = read_typed_csv(sales_path, sales_input_schema, storage_options)
             sales_df = transform_sales_data(sales_df)
 
             output_path = f"s3://{config['s3']['bucket']}/{config['s3']['output_folder']}/cleaned_sales.csv"
@@ -87,7 +101,7 @@ def retail_etl_dag():
         
         @task()
         def transform_products(products_path: str):
-            products_df = pd.read_json(products_path, storage_options=storage_options)
+            products_df = read_typed_json(products_path, product_input_schema, storage_options)
             products_df = transform_products_data(products_df)
 
             output_path = f"s3://{config['s3']['bucket']}/{config['s3']['output_folder']}/cleaned_products.csv"
@@ -105,10 +119,25 @@ def retail_etl_dag():
 
         
 
+    @task.short_circuit
+    def check_inputs_changed(manifest: list, sales_path: str, products_path: str) -> bool:
+        cached_manifest = read_cached_manifest(config["s3"]["bucket"], config["s3"]["manifest_key"], config["aws_conn_id"])
+        return inputs_changed(manifest, cached_manifest, [sales_path, products_path])
+
+    @task
+    def save_input_manifest(manifest: list):
+        save_manifest(manifest, config["s3"]["bucket"], config["s3"]["manifest_key"], config["aws_conn_id"])
+
+
     extract_output = extract_group()
     sales_path = extract_output["sales_path"]
     products_path = extract_output["products_path"]
 
-    transform_group(sales_path, products_path)
+    # Unchanged sales and products objects skip the transforms, the manifest is saved after they succeed
+    changed = check_inputs_changed(extract_output["manifest"], sales_path, products_path)
+    transform_output = transform_group(sales_path, products_path)
+    transformed = [transform_output["cleaned_sales"], transform_output["cleaned_products"]]
+
+    changed >> transformed >> save_input_manifest(extract_output["manifest"])
 
 retail_etl_dag()
@@ -1,3 +1,5 @@
+import json
+
 from airflow.sdk.exceptions import AirflowException
 from include.s3_utils import get_storage_options
 
@@ -6,23 +8,98 @@ from ..logger import setup_logger
 
 logging = setup_logger("etl.extract_s3")
 
-def extract_data_from_s3(bucket: str, folder: str, aws_conn_id: str, file_type: str = "csv") -> list:
-    """
-    Extracts data from different types of files on an S3.
 
+# Manifest fields compared to decide whether an input object changed
+CHANGE_FIELDS = ("key", "size", "etag")
+
+
+def list_s3_manifest(bucket: str, folder: str, aws_conn_id: str) -> list:
     """
+    Lists a prefix once, page by page, and returns one manifest entry per object: key, size, ETag and LastModified.
 
-    logging.info(f"Extracting {file_type} files from s3://{bucket}/{folder}")
+    """
+    logging.info(f"Listing s3://{bucket}/{folder}")
 
     s3_hook, storage_options = get_storage_options(aws_conn_id)
-    keys = s3_hook.list_keys(bucket_name=bucket, prefix=folder)
+    paginator = s3_hook.get_conn().get_paginator("list_objects_v2")
 
-    if not keys:
+    manifest = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=folder):
+        for entry in page.get("Contents", []):
+            manifest.append({
+                "key": entry["Key"],
+                "size": entry["Size"],
+                "etag": entry["ETag"].strip('"'),
+                "last_modified": entry["LastModified"].isoformat(),
+            })
+
+    if not manifest:
         raise AirflowException(f"No files found in s3://{bucket}/{folder}")
 
-    matches_paths = [f"s3://{bucket}/{key}" for key in keys if key.endswith(f".{file_type}")]
+    logging.info(f"{len(manifest)} objects listed in s3://{bucket}/{folder}")
+
+    return manifest
+
+
+def extract_data_from_s3(bucket: str, folder: str, aws_conn_id: str, file_type: str = "csv", manifest: list | None = None) -> list:
+    """
+    Extracts data from different types of files on an S3, from a listing manifest when one is given.
+
+    """
+
+    logging.info(f"Extracting {file_type} files from s3://{bucket}/{folder}")
+
+    if manifest is None:
+        manifest = list_s3_manifest(bucket, folder, aws_conn_id)
+
+    matches_paths = [f"s3://{bucket}/{entry['key']}" for entry in manifest if entry["key"].endswith(f".{file_type}")]
 
     if not matches_paths:
         raise AirflowException(f"No {file_type} files found in s3://{bucket}/{folder}")
 
     return matches_paths
+
+
+def read_cached_manifest(bucket: str, manifest_key: str, aws_conn_id: str) -> list | None:
+    """
+    Reads the manifest saved by the last successful run, None when there is none.
+
+    """
+    s3_hook, storage_options = get_storage_options(aws_conn_id)
+
+    if not s3_hook.check_for_key(manifest_key, bucket_name=bucket):
+        return None
+
+    return json.loads(s3_hook.read_key(manifest_key, bucket_name=bucket))
+
+
+def save_manifest(manifest: list, bucket: str, manifest_key: str, aws_conn_id: str) -> None:
+    """
+    Saves the manifest of a successful run, the next run compares its inputs against it.
+
+    """
+    s3_hook, storage_options = get_storage_options(aws_conn_id)
+    s3_hook.load_string(json.dumps(manifest, indent=2), key=manifest_key, bucket_name=bucket, replace=True)
+
+    logging.info(f"Input manifest saved to s3://{bucket}/{manifest_key}")
+
+
+def inputs_changed(manifest: list, cached_manifest: list | None, paths: list) -> bool:
+    """
+    Checks whether any of the input paths is new or has a different size or ETag than in the cached manifest.
+
+    """
+    if cached_manifest is None:
+        logging.info("No cached input manifest, the inputs are processed")
+        return True
+
+    keys = {path.split("/", 3)[-1] for path in paths}
+
+    def signatures(entries: list) -> set:
+        return {tuple(entry[field] for field in CHANGE_FIELDS) for entry in entries if entry["key"] in keys}
+
+    changed = signatures(manifest) != signatures(cached_manifest)
+
+    logging.info(f"Inputs {'changed' if changed else 'unchanged'} since the last successful run: {sorted(keys)}")
+
+    return changed
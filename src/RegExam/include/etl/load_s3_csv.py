@@ -1,6 +1,7 @@
 import pandas as pd
 
-from include.s3_utils import get_storage_options
+from include.s3_utils import get_s3_filesystem
+from include.metrics import instrument_stage, record_io
 
 from ..logger import setup_logger
 
@@ -8,15 +9,16 @@ from ..logger import setup_logger
 logging = setup_logger("etl.load_s3_csv")
 
 
+@instrument_stage()
 def load_df_to_s3_csv(df: pd.DataFrame, s3_path: str, aws_conn_id: str) -> None:
     """
     Loads a DataFrame to an S3 path in CSV format.
 
     """
-    s3_hook, storage_options = get_storage_options(aws_conn_id)
-
     try:
-        df.to_csv(s3_path, index=False, storage_options=storage_options)
+        data = df.to_csv(index=False).encode("utf-8")
+        get_s3_filesystem(aws_conn_id).pipe_file(s3_path, data)
+        record_io(bytes_written=len(data))
         logging.info(f"DataFrame successfully loaded to {s3_path}")
     except Exception as e:
         logging.error(f"Failed to load DataFrame to {s3_path}: {e}")
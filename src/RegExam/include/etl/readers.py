@@ -0,0 +1,81 @@
+import pandas as pd
+
+from include.metrics import instrument_stage, record_file_read
+from include.timestamps import parse_timestamps
+
+from ..logger import setup_logger
+
+
+logging = setup_logger("etl.readers")
+
+
+# Schema dtypes pandas keeps as inferred: strings stay object columns
+INFERRED_DTYPES = ("str", "object")
+DATETIME_PREFIX = "datetime64"
+
+
+def schema_read_options(schema) -> dict:
+    """
+    Derives the columns to read, their dtypes and their date columns from a pandera input schema.
+
+    """
+    dtypes, parse_dates = {}, []
+
+    for name, column in schema.columns.items():
+        dtype = str(column.dtype)
+
+        if dtype.startswith(DATETIME_PREFIX):
+            parse_dates.append(name)
+        elif dtype not in INFERRED_DTYPES:
+            dtypes[name] = dtype
+
+    return {"usecols": list(schema.columns), "dtype": dtypes, "parse_dates": parse_dates}
+
+
+@instrument_stage()
+def read_typed_csv(path: str, schema, storage_options: dict | None = None) -> pd.DataFrame:
+    """
+    Reads only the schema's columns of a CSV file, typed by the schema, with the multithreaded pyarrow parser.
+
+    """
+    options = schema_read_options(schema)
+    logging.info(f"Reading {path} with dtypes {options['dtype']}")
+    record_file_read(path, storage_options)
+
+    # pyarrow parses ISO timestamps itself, other formats are left to parse_timestamps
+    df = pd.read_csv(
+        path,
+        engine="pyarrow",
+        usecols=options["usecols"],
+        dtype=options["dtype"],
+        storage_options=storage_options,
+    )
+
+    return _parse_date_columns(df, options["parse_dates"])
+
+
+@instrument_stage()
+def read_typed_json(path: str, schema, storage_options: dict | None = None) -> pd.DataFrame:
+    """
+    Reads a JSON file and keeps only the schema's columns, typed by the schema.
+
+    """
+    options = schema_read_options(schema)
+    logging.info(f"Reading {path} with dtypes {options['dtype']}")
+    record_file_read(path, storage_options)
+
+    # Without inference pandas keeps the JSON values, the schema dtypes are applied once
+    df = pd.read_json(path, dtype=False, convert_dates=False, storage_options=storage_options)
+
+    return _parse_date_columns(df[options["usecols"]].astype(options["dtype"]), options["parse_dates"])
+
+
+def _parse_date_columns(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """
+    Parses the date columns not parsed by the reader and brings all of them to nanosecond precision.
+
+    """
+    for column in columns:
+        df[column] = parse_timestamps(df[column]).astype("datetime64[ns]")
+
+    return df
@@ -2,6 +2,8 @@ import pandas as pd
 
 from include.validations.validate_inputs import validate_input_products_schema, validate_input_sales_schema
 from include.validations.validate_outputs import validate_output_products_schema, validate_output_sales_schema
+from include.timestamps import parse_timestamps
+from include.metrics import instrument_stage
 
 from ..logger import setup_logger
 
@@ -9,6 +11,7 @@ from ..logger import setup_logger
 logging = setup_logger("etl.transform")
 
 
+@instrument_stage()
 def transform_sales_data(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     Transforms the sales DataFrame by cleaning and formatting.
@@ -26,9 +29,10 @@ def transform_sales_data(sales_df: pd.DataFrame) -> pd.DataFrame:
     sales_df.columns = sales_df.columns.str.strip().str.lower().str.replace(' ', '_')
     sales_df = sales_df.rename(columns={'qty': 'quantity', "time_stamp": "timestamp"})
     sales_df = sales_df.dropna()
+    sales_df = sales_df.astype({column: "int64" for column in sales_df.select_dtypes("Int64").columns})
     sales_df = sales_df[(sales_df["price"] > 0) & (sales_df["quantity"] > 0)]
     sales_df["region"] = sales_df["region"].str.lower()
-    sales_df["timestamp"] = pd.to_datetime(sales_df["timestamp"], format="mixed", errors="coerce")
+    sales_df["timestamp"] = parse_timestamps(sales_df["timestamp"])
     sales_df = sales_df.drop_duplicates().reset_index(drop=True)
     
     sales_df = validate_output_sales_schema(sales_df)
@@ -38,6 +42,7 @@ def transform_sales_data(sales_df: pd.DataFrame) -> pd.DataFrame:
     return sales_df
     
 
+@instrument_stage()
 def transform_products_data(products_df: pd.DataFrame) -> pd.DataFrame:
     """
     Transforms the products DataFrame by cleaning and formatting.
@@ -55,7 +60,8 @@ def transform_products_data(products_df: pd.DataFrame) -> pd.DataFrame:
     products_df = products_df.copy()
     products_df.columns = products_df.columns.str.strip().str.lower().str.replace(' ', '_')    
     products_df = products_df.dropna()
-    products_df["launch_date"] = pd.to_datetime(products_df["launch_date"], format="mixed", errors="coerce")
+    products_df = products_df.astype({column: "int64" for column in products_df.select_dtypes("Int64").columns})
+    products_df["launch_date"] = parse_timestamps(products_df["launch_date"])
     products_df = products_df.drop_duplicates()
     
     products_df = validate_output_products_schema(products_df)
@@ -1,25 +1,28 @@
+import pandera as pa
+
 from pandera import DataFrameSchema, Column
 
 
+# The dtypes the readers parse with: nullable ints, categories for repeated labels, float32 for bounded decimals, dates
 sales_input_schema = DataFrameSchema(
     {
-        "sales id": Column(int),
-        "proDuct Id": Column(int),
-        "Region": Column(str, nullable=True),
-        "qty": Column(int),
+        "sales id": Column("Int64"),
+        "proDuct Id": Column("Int64"),
+        "Region": Column("category", nullable=True),
+        "qty": Column("Int64"),
         "Price": Column(float),
-        "Time stamp": Column(str, nullable=True),
-        "discount": Column(float),
-        "order_status": Column(str)
+        "Time stamp": Column(pa.DateTime, nullable=True),
+        "discount": Column("float32"),
+        "order_status": Column("category")
     })
 
 
 product_input_schema = DataFrameSchema(
     {
-        "product_id": Column(int),
+        "product_id": Column("Int64"),
         "category": Column(str),
         "brand": Column(str),
-        "rating": Column(float),
+        "rating": Column("float32"),
         "in_stock": Column(bool),
-        "launch_date": Column(str, nullable=True)
+        "launch_date": Column(pa.DateTime, nullable=True)
     })
@@ -11,8 +11,8 @@ sales_output_schema = DataFrameSchema(
         "quantity": Column(int, Check.greater_than(0)),
         "price": Column(float, Check.greater_than(0.0)),
         "timestamp": Column(pa.DateTime),
-        "discount": Column(float, Check.between(0, 1)),
-        "order_status": Column(str)
+        "discount": Column("float32", Check.between(0, 1)),
+        "order_status": Column("category")
     })
 
 
@@ -21,7 +21,7 @@ product_output_schema = DataFrameSchema(
         "product_id": Column(int, Check.greater_than(0)),
         "category": Column(str, Check(lambda s: s.str[0].str.isupper())),
         "brand": Column(str, checks=Check.str_matches(r'^Brand[A-Z]$')),
-        "rating": Column(float, Check.between(0.0, 5.0)),
+        "rating": Column("float32", Check.between(0.0, 5.0)),
         "in_stock": Column(bool),
         "launch_date": Column(pa.DateTime)
     })
@@ -1,6 +1,8 @@
 import pandas as pd
 from pandera.errors import SchemaErrors
 
+from .fast_validation import validate_fast
+from ..metrics import instrument_stage
 from .input_schemas import sales_input_schema, product_input_schema
 from ..logger import setup_logger
 
@@ -8,6 +10,7 @@ from ..logger import setup_logger
 logging = setup_logger("validations.input_schemas")
 
 
+@instrument_stage()
 def validate_input_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the input sales DataFrame against the predefined schema.
@@ -16,7 +19,7 @@ def validate_input_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
     logging.info("Validating input sales data schema")
     
     try:
-        sales_input_schema.validate(sales_df)
+        validate_fast(sales_input_schema, sales_df)
         logging.info("Input sales data schema validation passed")
         return sales_df
     except SchemaErrors as e:
@@ -24,6 +27,7 @@ def validate_input_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
         return sales_df
     
 
+@instrument_stage()
 def validate_input_products_schema(products_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the input products DataFrame against the predefined schema.
@@ -32,7 +36,7 @@ def validate_input_products_schema(products_df: pd.DataFrame) -> pd.DataFrame:
     logging.info("Validating input products data schema")
     
     try:
-        product_input_schema.validate(products_df)
+        validate_fast(product_input_schema, products_df)
         logging.info("Input products data schema validation passed")
         return products_df
     except SchemaErrors as e:
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from .fast_validation import validate_fast
+from ..metrics import instrument_stage
 from .output_schemas import sales_output_schema, product_output_schema
 from ..logger import setup_logger
 
@@ -7,6 +9,7 @@ from ..logger import setup_logger
 logging = setup_logger("validations.output_schemas")
 
 
+@instrument_stage()
 def validate_output_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the output sales DataFrame against the predefined schema.
@@ -14,9 +17,10 @@ def validate_output_sales_schema(sales_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating output sales data schema")
     
-    return sales_output_schema.validate(sales_df)
+    return validate_fast(sales_output_schema, sales_df)
 
 
+@instrument_stage()
 def validate_output_products_schema(products_df: pd.DataFrame) -> pd.DataFrame:
     """
     Validates the output products DataFrame against the predefined schema.
@@ -24,5 +28,5 @@ def validate_output_products_schema(products_df: pd.DataFrame) -> pd.DataFrame:
     """
     logging.info("Validating output products data schema")
     
-    return product_output_schema.validate(products_df)
+    return validate_fast(product_output_schema, products_df)
 